@@ -0,0 +1,247 @@
+# backend/app/answer_buffer.py
+"""Optional write-behind mode for answer saves (ANSWER_WRITE_BEHIND=1).
+
+A save is acknowledged once it is appended to a local fsync'd journal and
+held in an in-memory per-attempt buffer. A flusher thread applies the
+buffer to the DB in one transaction every ANSWER_FLUSH_INTERVAL_MS, and the
+journal is replayed on startup, so an acknowledged answer survives a crash.
+
+Reads of an open attempt (resume, submit, result) overlay the buffer, so
+candidates never see stale state. The buffer lock is held across the
+journal fsync, so async endpoints take it through asyncio.to_thread and
+pass what they read to the sync helpers. The buffer lives in one process:
+run a single worker, or route each candidate to the same worker, when
+enabled.
+"""
+import os
+import glob
+import json
+import threading
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from .db import SessionLocal
+from . import models, exam
+
+ENABLED = os.getenv("ANSWER_WRITE_BEHIND") == "1"
+FLUSH_INTERVAL_MS = int(os.getenv("ANSWER_FLUSH_INTERVAL_MS", "500"))
+JOURNAL_PATH = os.getenv("ANSWER_JOURNAL_PATH", "answer_journal.jsonl")
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()  # one flush at a time
+_pending = {}  # candidate_exam_id -> {"answers": {qid: index}, "time_elapsed": int}
+_flushing = {}  # batch currently being written, still visible to reads
+_owners = {}  # candidate_exam_id -> (user_id, deadline_at), for attempts already checked against the DB
+_journal = None
+_segment = 0  # number of the last journal segment rotated out for flushing
+
+_stop = threading.Event()
+_thread = None
+
+
+def _merge(target: dict, candidate_exam_id: str, answers: Dict[str, int], time_elapsed: Optional[int]):
+    entry = target.setdefault(candidate_exam_id, {"answers": {}, "time_elapsed": None})
+    entry["answers"].update(answers)
+    if time_elapsed is not None:
+        entry["time_elapsed"] = time_elapsed
+
+
+# Ownership of an attempt is checked against the DB once, then cached:
+# cached_owner() or load_owner() + remember_owner(), then owner_accepts()
+
+def cached_owner(candidate_exam_id: str) -> Optional[tuple]:
+    """(user_id, deadline_at) of an attempt already checked, if any."""
+    with _lock:
+        return _owners.get(candidate_exam_id)
+
+
+def load_owner(db: Session, candidate_exam_id: str, user_id: str) -> Optional[tuple]:
+    """(user_id, deadline_at) if the attempt is the user's and open; no lock taken."""
+    found = db.query(models.CandidateExam.deadline_at).filter(
+        models.CandidateExam.id == candidate_exam_id,
+        models.CandidateExam.user_id == user_id,
+        models.CandidateExam.status == "in_progress"
+    ).first()
+    return (user_id, found.deadline_at) if found else None
+
+
+def remember_owner(candidate_exam_id: str, owner: tuple):
+    with _lock:
+        _owners[candidate_exam_id] = owner
+
+
+def owner_accepts(owner: tuple, user_id: str) -> bool:
+    """True if the attempt is the user's and still takes writes."""
+    owner_id, deadline_at = owner
+    return owner_id == user_id and (deadline_at is None or deadline_at >= exam.write_cutoff())
+
+
+def add(candidate_exam_id: str, answers: Dict[str, int], time_elapsed: int):
+    """Journal and buffer a save; returns once the journal entry is on disk."""
+    global _journal
+    record = json.dumps({"ce": candidate_exam_id, "a": answers, "t": time_elapsed})
+    with _lock:
+        if _journal is None:
+            _journal = open(JOURNAL_PATH, "a", encoding="utf-8")
+        _journal.write(record + "\n")
+        _journal.flush()
+        os.fsync(_journal.fileno())
+        _merge(_pending, candidate_exam_id, answers, time_elapsed)
+
+
+def _peek_locked(candidate_exam_id: str) -> Optional[dict]:
+    view = {}
+    for source in (_flushing, _pending):
+        entry = source.get(candidate_exam_id)
+        if entry is not None:
+            _merge(view, candidate_exam_id, entry["answers"], entry["time_elapsed"])
+    return view.get(candidate_exam_id)
+
+
+def peek(candidate_exam_id: str) -> Optional[dict]:
+    """Buffered, not yet committed state of one attempt, if any."""
+    with _lock:
+        return _peek_locked(candidate_exam_id)
+
+
+def overlay(candidate_exam_ids) -> Dict[str, dict]:
+    """peek() for several attempts under one lock; {} when write-behind is off."""
+    if not ENABLED:
+        return {}
+    with _lock:
+        view = {ce_id: _peek_locked(ce_id) for ce_id in candidate_exam_ids}
+    return {ce_id: entry for ce_id, entry in view.items() if entry is not None}
+
+
+def discard(candidate_exam_ids):
+    """Forget buffered state of attempts whose answers the caller has committed.
+
+    Callers write what peek() returned and discard only after their commit,
+    so a failed transaction leaves the answers buffered for the next flush.
+    Journal entries stay until that flush; replaying them later is harmless
+    because flushes skip attempts that are no longer open.
+    """
+    with _lock:
+        for ce_id in candidate_exam_ids:
+            _owners.pop(ce_id, None)
+            _pending.pop(ce_id, None)
+
+
+def _apply(db: Session, batch: dict):
+    CE = models.CandidateExam
+    for ce_id, entry in batch.items():
+        # Only open attempts take buffered writes (closed ones already have a
+        # snapshot). The conditional UPDATE also waits out a concurrent
+        # submit or expiry holding the row, then sees it closed.
+        time_elapsed = entry["time_elapsed"]
+        updated = db.query(CE).filter(CE.id == ce_id, CE.status == "in_progress").update(
+            {"time_elapsed": CE.time_elapsed if time_elapsed is None else time_elapsed},
+            synchronize_session=False
+        )
+        if updated:
+            exam.save_answers(db, ce_id, entry["answers"])
+
+
+def flush() -> int:
+    """Write everything buffered so far in one transaction; returns attempts flushed."""
+    global _segment, _pending, _flushing, _journal
+
+    with _flush_lock:
+        with _lock:
+            if not _pending:
+                return 0
+            batch = _flushing = _pending
+            _pending = {}
+            # Rotate the journal: entries written from now on belong to the next flush
+            if _journal is not None:
+                _journal.close()
+                _journal = None
+            if os.path.exists(JOURNAL_PATH):
+                _segment += 1
+                os.replace(JOURNAL_PATH, f"{JOURNAL_PATH}.{_segment:08d}")
+            segment = _segment
+
+        db = SessionLocal()
+        try:
+            _apply(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the batch back without clobbering anything newer
+            with _lock:
+                for ce_id, entry in batch.items():
+                    newer = _pending.get(ce_id)
+                    _pending[ce_id] = entry
+                    if newer is not None:
+                        _merge(_pending, ce_id, newer["answers"], newer["time_elapsed"])
+                _flushing = {}
+            raise
+        finally:
+            db.close()
+
+        with _lock:
+            _flushing = {}
+
+        # Failed earlier segments were merged back into this batch, so drop them too
+        for path in _segments():
+            if _segment_number(path) <= segment:
+                os.remove(path)
+        return len(batch)
+
+
+def _segments():
+    return sorted(glob.glob(f"{JOURNAL_PATH}.[0-9]*"))
+
+
+def _segment_number(path: str) -> int:
+    return int(path.rsplit(".", 1)[1])
+
+
+def replay():
+    """Load journal segments left by a previous process into the buffer."""
+    global _segment
+    segments = _segments()
+    paths = segments + ([JOURNAL_PATH] if os.path.exists(JOURNAL_PATH) else [])
+
+    with _lock:
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash mid-write
+                    _merge(_pending, record["ce"], record["a"], record["t"])
+        if segments:
+            _segment = max(_segment, _segment_number(segments[-1]))
+
+
+def _run():
+    while not _stop.wait(FLUSH_INTERVAL_MS / 1000):
+        try:
+            flush()
+        except Exception as e:
+            print(f"❌ Answer flush failed, will retry: {e}")
+
+
+def start():
+    global _thread
+    if not ENABLED or _thread is not None:
+        return
+    replay()
+    flush()
+    _thread = threading.Thread(target=_run, name="answer-flusher", daemon=True)
+    _thread.start()
+
+
+def stop():
+    global _thread, _journal
+    if _thread is None:
+        return
+    _stop.set()
+    _thread.join()
+    _thread = None
+    flush()
+    with _lock:
+        if _journal is not None:
+            _journal.close()
+            _journal = None
@@ -0,0 +1,56 @@
+# backend/app/async_db.py
+"""Async engine and sessions (SQLAlchemy asyncio) for the exam-taking endpoints.
+
+Connects to the same database as db.py with an async driver: asyncpg for
+Postgres, aiosqlite for SQLite. Set ASYNC_DATABASE_URL to override the
+derived URL. Sync helpers that take a Session are reused through
+``AsyncSession.run_sync``. It runs them on the event loop thread (in a
+greenlet), so only their DB I/O is non-blocking: anything else they wait
+on, such as a threading lock, stalls the loop and belongs in
+asyncio.to_thread instead.
+"""
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from .db import (
+    SQLALCHEMY_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS
+)
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str) -> str:
+    """``url`` with its driver swapped for the async one (postgresql:// -> postgresql+asyncpg://)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def make_async_engine(url: str):
+    if url.startswith("sqlite"):
+        return create_async_engine(url)
+
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+
+    # Separate pool from the sync engine; size both within the server's max_connections
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args
+    )
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = make_async_engine(ASYNC_DATABASE_URL)
+# No expiry on commit: lazy reloads can't happen implicitly under asyncio
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -1,21 +1,72 @@
 # backend/app/auth.py
-from passlib.context import CryptContext
+import os
+import time
+import threading
+from collections import OrderedDict
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from .db import SessionLocal
-from . import models
+from sqlalchemy.ext.asyncio import AsyncSession
+from .db import SessionLocal, ReadSessionLocal
+from .async_db import AsyncSessionLocal
+from . import models, hashing
 
 
 SECRET_KEY = "supersecret-nmk-demo-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60*24
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECS = int(os.getenv("AUTH_USER_CACHE_TTL_SECS", "60"))
+
+pwd_context = hashing.pwd_context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+class TTLCache:
+    """Thread-safe bounded LRU whose entries expire at a given wall-clock time."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at: float):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = TTLCache(TOKEN_CACHE_SIZE)  # token -> (email, exp)
+user_cache = TTLCache(USER_CACHE_SIZE)  # email -> detached User snapshot
+
 def get_db():
     db = SessionLocal()
     try:
@@ -23,11 +74,49 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    # Replica session for read-only admin views; never write through it
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    # For the async exam-taking endpoints; see async_db.py
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _hash_pool_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": str(hashing.HASH_RETRY_AFTER_SECS)},
+    )
+
 def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
+    try:
+        return hashing.verify_password(plain, hashed)
+    except hashing.HashPoolBusy:
+        raise _hash_pool_busy()
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    try:
+        return hashing.hash_password(password)
+    except hashing.HashPoolBusy:
+        raise _hash_pool_busy()
+
+async def verify_password_async(plain, hashed):
+    try:
+        return await hashing.verify_password_async(plain, hashed)
+    except hashing.HashPoolBusy:
+        raise _hash_pool_busy()
+
+async def get_password_hash_async(password):
+    try:
+        return await hashing.hash_password_async(password)
+    except hashing.HashPoolBusy:
+        raise _hash_pool_busy()
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -47,20 +136,93 @@ def authenticate_user(db: Session, email: str, password: str):
         return None
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str):
+    # Awaits the hash pool instead of holding a threadpool thread
+    user = await get_user_by_email_async(db, email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
+def invalidate_user(email: str):
+    """Drop a cached user row; call whenever a user is created or changed."""
+    user_cache.pop(email)
+
+
+def _snapshot_user(user: models.User) -> models.User:
+    # Detached copy so it is safe to hand out across sessions and threads
+    return models.User(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        hashed_password=user.hashed_password,
+        is_admin=user.is_admin,
+        created_at=user.created_at
+    )
+
+
+def decode_token(token: str):
+    """Return (email, exp) for a valid token, from cache when possible."""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email = payload.get("sub")
+    exp = payload.get("exp")
+    if email is None or exp is None:
+        raise JWTError("token has no subject or expiry")
+
+    token_cache.set(token, (email, exp), expires_at=exp)
+    return email, exp
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _token_subject(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        return decode_token(token)
     except JWTError:
-        raise credentials_exception
-    user = get_user_by_email(db, email=email)
+        raise _credentials_exception()
+
+
+def _cache_user(user: models.User, exp) -> models.User:
+    user = _snapshot_user(user)
+    user_cache.set(user.email, user, expires_at=min(time.time() + USER_CACHE_TTL_SECS, exp))
+    return user
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    email, exp = _token_subject(token)
+
+    user = user_cache.get(email)
+    if user is None:
+        user = get_user_by_email(db, email=email)
+        if user is None:
+            raise _credentials_exception()
+        user = _cache_user(user, exp)
+    return user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """get_current_user for async endpoints; shares its caches."""
+    email, exp = _token_subject(token)
+
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = await get_user_by_email_async(db, email)
+        if user is None:
+            raise _credentials_exception()
+        user = _cache_user(user, exp)
     return user
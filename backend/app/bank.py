@@ -0,0 +1,119 @@
+# backend/app/bank.py
+"""Language-keyed question bank shared across exams.
+
+Inventory is topped up outside business hours, e.g. from cron:
+
+    python -m backend.app.bank --languages Java Python --target 500
+"""
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .db import SessionLocal
+from .models import Question
+
+BANK_LANGUAGES = [l.strip() for l in os.getenv("QUESTION_BANK_LANGUAGES", "").split(",") if l.strip()]
+BANK_TARGET = int(os.getenv("QUESTION_BANK_TARGET", "200"))
+BANK_WORKERS = int(os.getenv("QUESTION_BANK_WORKERS", "2"))
+BUSINESS_HOURS = os.getenv("QUESTION_BANK_BUSINESS_HOURS", "8-18")  # local hours, start-end
+
+
+def language_key(language: str) -> str:
+    return language.strip().lower()
+
+
+def pick_questions(db: Session, language: str, count: int) -> List[str]:
+    """Random sample of up to ``count`` bank question ids for ``language``."""
+    rows = db.query(Question.id).filter(
+        Question.language == language_key(language)
+    ).order_by(func.random()).limit(count).all()
+    return [qid for (qid,) in rows]
+
+
+def add_questions(db: Session, language: str, questions: List[dict]) -> List[Question]:
+    """Add parsed LLM questions to the bank (flushed, not committed)."""
+    created = [
+        Question(
+            text=q["question"],
+            choices=q["options"],
+            answer_index=q["answer_index"],
+            language=language_key(language)
+        )
+        for q in questions
+    ]
+    db.add_all(created)
+    db.flush()
+    return created
+
+
+def inventory(db: Session, languages: List[str]) -> Dict[str, int]:
+    keys = [language_key(l) for l in languages]
+    rows = db.query(Question.language, func.count(Question.id)).filter(
+        Question.language.in_(keys)
+    ).group_by(Question.language).all()
+    counts = dict(rows)
+    return {key: counts.get(key, 0) for key in keys}
+
+
+def fill_language(language: str, target: int) -> int:
+    """Generate questions until ``language`` has ``target`` in the bank."""
+    db = SessionLocal()
+    try:
+        have = inventory(db, [language])[language_key(language)]
+    finally:
+        db.close()
+
+    shortfall = target - have
+    if shortfall <= 0:
+        return 0
+
+    from . import llm  # requests & co. only load when the bank is refilled
+
+    # No DB session is held while the LLM calls run
+    questions = llm.generate_questions(language, shortfall)
+
+    db = SessionLocal()
+    try:
+        add_questions(db, language, questions)
+        db.commit()
+    finally:
+        db.close()
+
+    return len(questions)
+
+
+def in_business_hours(now: datetime | None = None) -> bool:
+    start, end = (int(h) for h in BUSINESS_HOURS.split("-"))
+    hour = (now or datetime.now()).hour
+    return start <= hour < end
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate question bank inventory")
+    parser.add_argument("--languages", nargs="+", default=BANK_LANGUAGES)
+    parser.add_argument("--target", type=int, default=BANK_TARGET)
+    parser.add_argument("--workers", type=int, default=BANK_WORKERS)
+    parser.add_argument("--force", action="store_true", help="run even during business hours")
+    args = parser.parse_args(argv)
+
+    if not args.languages:
+        parser.error("no languages given (use --languages or QUESTION_BANK_LANGUAGES)")
+
+    if in_business_hours() and not args.force:
+        print(f"Inside business hours ({BUSINESS_HOURS}), skipping. Use --force to override.")
+        return
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(fill_language, language, args.target): language for language in args.languages}
+        for future, language in futures.items():
+            try:
+                print(f"{language}: added {future.result()} questions")
+            except Exception as e:
+                print(f"{language}: failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
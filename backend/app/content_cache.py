@@ -0,0 +1,151 @@
+# backend/app/content_cache.py
+"""In-process cache of exam question content.
+
+An exam's questions never change once it is created, so the candidate view
+of them (no answer indexes) is built once per exam and kept with its
+serialized JSON body, gzip/brotli variants and a strong ETag. Concurrent
+misses for the same exam share one DB load (single flight), so a cohort
+starting at the same minute costs one query. Clients fetch it from
+/exam/{id}/questions, which answers If-None-Match with 304.
+"""
+import os
+import gzip
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional
+import orjson
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import exam
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always offered
+    brotli = None
+
+EXAM_CONTENT_CACHE_SIZE = int(os.getenv("EXAM_CONTENT_CACHE_SIZE", "256"))
+EXAM_CONTENT_GZIP_LEVEL = int(os.getenv("EXAM_CONTENT_GZIP_LEVEL", "6"))
+EXAM_CONTENT_BROTLI_QUALITY = int(os.getenv("EXAM_CONTENT_BROTLI_QUALITY", "5"))
+
+
+class ExamContent:
+    def __init__(self, question_ids: List[str], questions: List[dict], compress: bool = False):
+        self.question_ids = list(question_ids)
+        self.questions = questions
+        self.body = orjson.dumps(questions)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        # Only cached entries are worth compressing ahead of time
+        self.gzip = self.br = None
+        if compress:
+            self.gzip = gzip.compress(self.body, compresslevel=EXAM_CONTENT_GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.br = brotli.compress(self.body, quality=EXAM_CONTENT_BROTLI_QUALITY)
+
+    def encoded(self, accept_encoding: str):
+        """(body, Content-Encoding or None) for the client's Accept-Encoding."""
+        accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.body, None
+
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # exam_id -> ExamContent, least recently used first
+_loading = {}  # exam_id -> Future shared by callers waiting for the same load
+_async_loading = {}  # same for async callers; only touched from the event loop
+
+
+def _build(db: Session, question_ids: List[str], compress: bool = False) -> ExamContent:
+    questions = [
+        {"id": q.id, "text": q.text, "choices": q.choices}
+        for q in exam.load_questions(db, question_ids)
+    ]
+    return ExamContent(question_ids, questions, compress=compress)
+
+
+def _store(exam_id: str, content: ExamContent):
+    # Caller holds _lock
+    _cache[exam_id] = content
+    while len(_cache) > EXAM_CONTENT_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def get_content(db: Session, exam_id: str, question_ids: Optional[List[str]]) -> ExamContent:
+    """Question content of an attempt of ``exam_id`` with these ``question_ids``."""
+    question_ids = question_ids or []
+
+    with _lock:
+        content = _cache.get(exam_id)
+        if content is not None:
+            _cache.move_to_end(exam_id)
+        else:
+            future = _loading.get(exam_id)
+            owner = future is None
+            if owner:
+                future = _loading[exam_id] = Future()
+
+    if content is None:
+        if not owner:
+            content = future.result()
+        else:
+            try:
+                content = _build(db, question_ids, compress=True)
+            except Exception as e:
+                with _lock:
+                    _loading.pop(exam_id, None)
+                future.set_exception(e)
+                raise
+
+            with _lock:
+                _loading.pop(exam_id, None)
+                _store(exam_id, content)
+            future.set_result(content)
+
+    # Every attempt stores the exam's question list; anything else is built uncached
+    if content.question_ids != list(question_ids):
+        return _build(db, question_ids)
+    return content
+
+
+async def get_content_async(db: AsyncSession, exam_id: str, question_ids: Optional[List[str]]) -> ExamContent:
+    """get_content for async endpoints; waiting for another load never blocks the loop."""
+    question_ids = question_ids or []
+
+    with _lock:
+        content = _cache.get(exam_id)
+        if content is not None:
+            _cache.move_to_end(exam_id)
+
+    if content is None:
+        future = _async_loading.get(exam_id)
+        if future is not None:
+            # shield: a waiter going away must not cancel the shared load
+            content = await asyncio.shield(future)
+        else:
+            future = _async_loading[exam_id] = asyncio.get_running_loop().create_future()
+            try:
+                content = await db.run_sync(_build, question_ids, True)
+                with _lock:
+                    _store(exam_id, content)
+            finally:
+                _async_loading.pop(exam_id, None)
+                # None if the load failed; waiters then load for themselves below
+                future.set_result(content)
+
+    if content is None or content.question_ids != list(question_ids):
+        return await db.run_sync(_build, question_ids)
+    return content
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
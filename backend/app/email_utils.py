@@ -12,17 +12,11 @@ EMAIL_FROM = os.getenv("EMAIL_FROM")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 PORTAL_URL = os.getenv("PORTAL_URL")
 default_password = os.getenv("DEFAULT_CANDIDATE_PASSWORD")
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_DEBUG = os.getenv("SMTP_DEBUG") == "1"
 
-# 🔍 HARD DEBUG (TEMP)
-print("🔍 SMTP_SERVER:", SMTP_SERVER)
-print("🔍 SMTP_PORT:", SMTP_PORT)
-print("🔍 EMAIL_FROM:", EMAIL_FROM)
-print("🔍 EMAIL_PASSWORD LOADED:", bool(EMAIL_PASSWORD))
-
-
-def send_exam_assignment_email(to_email: str, exam_title: str):
-    print("📧 send_exam_assignment_email() CALLED")
 
+def build_exam_assignment_email(to_email: str, exam_title: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = "NMK Certification Exam Assigned"
     msg["From"] = EMAIL_FROM
@@ -44,17 +38,21 @@ password : {default_password}
 Regards,
 NMK Certification Team
 """)
+    return msg
+
+
+def open_smtp_connection() -> smtplib.SMTP:
+    """Connected, STARTTLS-upgraded and logged-in SMTP session.
 
+    Callers reuse it for as many messages as they like and quit() it when done.
+    """
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
     try:
-        print("📡 Connecting to Gmail SMTP...")
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.set_debuglevel(1)   # 🔥 VERY IMPORTANT
-            server.starttls()
-            print("🔐 Logging in to Gmail...")
-            server.login(EMAIL_FROM, EMAIL_PASSWORD)
-            print("✉️ Sending email...")
-            server.send_message(msg)
-            print("✅ EMAIL SENT SUCCESSFULLY")
-    except Exception as e:
-        print("❌ SMTP ERROR:", e)
+        if SMTP_DEBUG:
+            server.set_debuglevel(1)
+        server.starttls()
+        server.login(EMAIL_FROM, EMAIL_PASSWORD)
+    except Exception:
+        server.close()
         raise
+    return server
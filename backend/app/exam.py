@@ -1,55 +1,244 @@
 # backend/app/exam.py
-from typing import List
+import os
+import math
+import logging
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from .models import Question, CandidateExam
-from datetime import datetime
-
-def compute_score(db: Session, candidate_exam: CandidateExam):
-    if not candidate_exam.question_ids:
-        return 0
-    
-    correct = 0
-    total = len(candidate_exam.question_ids)
-    answers = candidate_exam.answers or {}
-    
-    print(f"\n{'='*60}")
-    print(f"COMPUTING SCORE")
-    print(f"{'='*60}")
-    print(f"Total questions: {total}")
-    print(f"Stored answers: {answers}")
-    print(f"{'='*60}\n")
-    
-    for qid in candidate_exam.question_ids:
-        q = db.query(Question).filter(Question.id == qid).first()
-        if not q:
-            print(f"⚠️ Question {qid} not found in database")
-            continue
-        
-        # ✅ Convert qid to string to match storage format
-        qid_str = str(qid)
-        sel = answers.get(qid_str)
-        
-        print(f"Question: {q.text[:50]}...")
-        print(f"  Question ID: {qid} → lookup key: '{qid_str}'")
-        print(f"  Selected: {sel}, Correct: {q.answer_index}")
-        
-        if sel is None:
-            print(f"  ❌ No answer recorded")
-            continue
-        
-        if sel == q.answer_index:
-            correct += 1
-            print(f"  ✅ CORRECT!")
-        else:
-            print(f"  ❌ WRONG!")
-        print("-" * 40)
-    
+from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy import and_, or_
+from .models import Question, CandidateExam, CandidateAnswer, Exam, ExamQuestion
+from .db import upsert
+from datetime import datetime, timedelta
+
+# Slack after the deadline for saves and submits already in flight
+DEADLINE_GRACE_SECS = int(os.getenv("EXAM_DEADLINE_GRACE_SECS", "30"))
+
+def create_exam_with_questions(
+    db: Session,
+    title: str,
+    language: str,
+    time_allowed_secs: int,
+    created_by: str,
+    question_ids: List[str]
+) -> Exam:
+    """Add an Exam linked to existing bank questions, in order (not committed)."""
+    new_exam = Exam(
+        title=title,
+        language=language,
+        question_count=len(question_ids),
+        time_allowed_secs=time_allowed_secs,
+        created_by=created_by,
+        is_active=True
+    )
+    db.add(new_exam)
+    db.flush()
+
+    db.add_all([
+        ExamQuestion(exam_id=new_exam.id, question_id=qid, position=position)
+        for position, qid in enumerate(question_ids)
+    ])
+
+    return new_exam
+
+
+def exam_question_ids(db: Session, exam_id: str) -> List[str]:
+    rows = db.query(ExamQuestion.question_id).filter(
+        ExamQuestion.exam_id == exam_id
+    ).order_by(ExamQuestion.position).all()
+    if rows:
+        return [qid for (qid,) in rows]
+
+    # Exams created before the question bank own their questions directly
+    rows = db.query(Question.id).filter(Question.exam_id == exam_id).all()
+    return [qid for (qid,) in rows]
+
+
+def load_questions(db: Session, question_ids: List[str]) -> List[Question]:
+    """Fetch all questions of an attempt in one query, in stored order.
+
+    Ids that no longer exist are skipped, same as the old per-id lookups.
+    """
+    if not question_ids:
+        return []
+
+    rows = db.query(Question).filter(Question.id.in_(question_ids)).all()
+    by_id = {q.id: q for q in rows}
+    return [by_id[qid] for qid in question_ids if qid in by_id]
+
+
+def save_answers(db: Session, candidate_exam_id: str, answers: Dict[str, int]):
+    """Upsert one row per answered question (not committed)."""
+    if not answers:
+        return
+
+    now = datetime.utcnow()
+    upsert(db, CandidateAnswer, [
+        {
+            "candidate_exam_id": candidate_exam_id,
+            "question_id": str(qid),
+            "selected_index": selected_index,
+            "answered_at": now
+        }
+        for qid, selected_index in answers.items()
+    ], index_elements=["candidate_exam_id", "question_id"], update_columns=["selected_index", "answered_at"])
+
+
+def deadline_for(time_allowed_secs: int, started_at: Optional[datetime] = None) -> datetime:
+    return (started_at or datetime.utcnow()) + timedelta(seconds=time_allowed_secs or 0)
+
+
+def write_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Attempts with a deadline before this no longer take writes."""
+    return (now or datetime.utcnow()) - timedelta(seconds=DEADLINE_GRACE_SECS)
+
+
+def accepts_writes(candidate_exam: CandidateExam, now: Optional[datetime] = None) -> bool:
+    if candidate_exam.status != "in_progress":
+        return False
+    # Attempts started before deadlines existed fall back to the old client-side timer
+    return candidate_exam.deadline_at is None or candidate_exam.deadline_at >= write_cutoff(now)
+
+
+def server_time_elapsed(candidate_exam: CandidateExam, now: Optional[datetime] = None) -> int:
+    """Seconds used according to the stored deadline, clamped to the time allowed."""
+    allowed = candidate_exam.time_allowed_secs or 0
+    remaining = (candidate_exam.deadline_at - (now or datetime.utcnow())).total_seconds()
+    # Round remaining time up so a fresh attempt reports 0, not 1
+    return allowed - max(0, min(allowed, math.ceil(remaining)))
+
+
+def record_answers(
+    db: Session,
+    candidate_exam_id: str,
+    user_id: str,
+    answers: Dict[str, int],
+    time_elapsed: int
+) -> bool:
+    """Apply answers and time_elapsed to one attempt (not committed).
+
+    Returns False if the attempt does not exist, is not the user's, or no
+    longer takes writes (submitted, or past its deadline).
+    """
+    # The ownership and deadline checks double as the time_elapsed update
+    updated = db.query(CandidateExam).filter(
+        CandidateExam.id == candidate_exam_id,
+        CandidateExam.user_id == user_id,
+        CandidateExam.status == "in_progress",
+        or_(CandidateExam.deadline_at.is_(None), CandidateExam.deadline_at >= write_cutoff())
+    ).update({"time_elapsed": time_elapsed}, synchronize_session=False)
+
+    if not updated:
+        return False
+
+    save_answers(db, candidate_exam_id, answers)
+    return True
+
+
+def current_answers(db: Session, candidate_exam: CandidateExam, buffered: Optional[dict] = None) -> dict:
+    """question_id -> selected index, in the shape CandidateExam.answers always had.
+
+    Submitted attempts read their compacted snapshot. Open attempts merge
+    the answer rows over any snapshot written before the answers table,
+    then ``buffered`` (the attempt's answer_buffer.peek()) over those.
+    """
+    answers = dict(candidate_exam.answers or {})
+    if candidate_exam.status == "in_progress":
+        rows = db.query(CandidateAnswer.question_id, CandidateAnswer.selected_index).filter(
+            CandidateAnswer.candidate_exam_id == candidate_exam.id
+        ).all()
+        answers.update({qid: selected_index for qid, selected_index in rows})
+        if buffered:
+            answers.update(buffered["answers"])
+    return answers
+
+
+def current_time_elapsed(candidate_exam: CandidateExam, buffered: Optional[dict] = None) -> int:
+    """time_elapsed of an attempt, from its deadline while it is open.
+
+    Open attempts without a deadline report the client's last save,
+    including a write-behind save not yet flushed (``buffered``).
+    """
+    if candidate_exam.status == "in_progress" and candidate_exam.deadline_at is not None:
+        return server_time_elapsed(candidate_exam)
+
+    if candidate_exam.status == "in_progress" and buffered and buffered["time_elapsed"] is not None:
+        return buffered["time_elapsed"]
+    return candidate_exam.time_elapsed
+
+
+def compact_answers(db: Session, candidate_exam: CandidateExam) -> dict:
+    """Fold the answer rows into CandidateExam.answers and drop them (not committed)."""
+    answers = current_answers(db, candidate_exam)
+    candidate_exam.answers = answers
+    flag_modified(candidate_exam, "answers")
+    db.query(CandidateAnswer).filter(
+        CandidateAnswer.candidate_exam_id == candidate_exam.id
+    ).delete(synchronize_session=False)
+    return answers
+
+
+def load_answer_key(db: Session, question_ids: List[str]) -> Dict[str, int]:
+    """Fetch only (id, answer_index) for the whole attempt in one query."""
+    if not question_ids:
+        return {}
+
+    rows = db.query(Question.id, Question.answer_index).filter(
+        Question.id.in_(question_ids)
+    ).all()
+    return {qid: answer_index for qid, answer_index in rows}
+
+
+def grade_answers(
+    question_ids: List[str],
+    answers: Optional[dict],
+    answer_key: Dict[str, int],
+    logger: Optional[logging.Logger] = None
+) -> dict:
+    """Grade one attempt in a single pass over its question ids.
+
+    Returns correct/total/percent plus ``is_correct``, a list aligned with
+    ``question_ids``. Questions missing from the key count as wrong.
+    """
+    question_ids = question_ids or []
+    answers = answers or {}
+    total = len(question_ids)
+
+    # answers are stored keyed by str(question_id)
+    selected = [answers.get(str(qid)) for qid in question_ids]
+    expected = [answer_key.get(qid) for qid in question_ids]
+    is_correct = [
+        sel is not None and key is not None and sel == key
+        for sel, key in zip(selected, expected)
+    ]
+
+    correct = sum(is_correct)
     percent = int((correct / total) * 100) if total > 0 else 0
-    candidate_exam.score = percent
-    
-    print(f"\n{'='*60}")
-    print(f"FINAL SCORE: {correct}/{total} = {percent}%")
-    print(f"{'='*60}\n")
-    
-    return percent
\ No newline at end of file
+
+    if logger is not None:
+        missing = [qid for qid, key in zip(question_ids, expected) if key is None]
+        if missing:
+            logger.debug("questions not found in database: %s", missing)
+        for qid, sel, key, ok in zip(question_ids, selected, expected, is_correct):
+            logger.debug("question %s: selected=%s correct=%s ok=%s", qid, sel, key, ok)
+        logger.debug("final score: %s/%s = %s%%", correct, total, percent)
+
+    return {
+        "correct": correct,
+        "total": total,
+        "percent": percent,
+        "is_correct": is_correct
+    }
+
+
+def grade_attempt(
+    db: Session,
+    candidate_exam: CandidateExam,
+    logger: Optional[logging.Logger] = None
+) -> dict:
+    answer_key = load_answer_key(db, candidate_exam.question_ids)
+    return grade_answers(
+        candidate_exam.question_ids,
+        candidate_exam.answers,
+        answer_key,
+        logger=logger
+    )
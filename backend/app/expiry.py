@@ -0,0 +1,137 @@
+# backend/app/expiry.py
+"""Background sweeper that times out attempts past their deadline.
+
+Open attempts are claimed in deadline order through the partial index on
+``deadline_at``, then graded and closed as ``timed_out`` in one transaction
+per batch. Run standalone with ``python -m backend.app.expiry``.
+"""
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from .db import SessionLocal
+from . import models, exam, answer_buffer, item_stats
+
+EXPIRY_BATCH_SIZE = int(os.getenv("EXAM_EXPIRY_BATCH_SIZE", "200"))
+EXPIRY_POLL_SECS = float(os.getenv("EXAM_EXPIRY_POLL_SECS", "30"))
+
+
+def claim_expired(db: Session, limit: int) -> List[models.CandidateExam]:
+    """Lock up to ``limit`` open attempts whose deadline and grace have passed."""
+    CE = models.CandidateExam
+    return db.query(CE).filter(
+        CE.status == "in_progress",
+        CE.deadline_at < exam.write_cutoff()
+    ).order_by(CE.deadline_at).limit(limit).with_for_update(skip_locked=True).all()
+
+
+def time_out_attempts(
+    db: Session,
+    attempts: List[models.CandidateExam],
+    buffered: Optional[Dict[str, dict]] = None
+):
+    """Grade and close expired attempts with a fixed number of queries (not committed).
+
+    Answers saved before the deadline count: the answer rows, plus anything
+    still in the write-behind buffer (``buffered``, from
+    answer_buffer.overlay()), are folded into the snapshot.
+    """
+    if not attempts:
+        return
+
+    ids = [ce.id for ce in attempts]
+    answers = {ce.id: dict(ce.answers or {}) for ce in attempts}
+
+    rows = db.query(
+        models.CandidateAnswer.candidate_exam_id,
+        models.CandidateAnswer.question_id,
+        models.CandidateAnswer.selected_index
+    ).filter(models.CandidateAnswer.candidate_exam_id.in_(ids)).all()
+    for ce_id, qid, selected_index in rows:
+        answers[ce_id][qid] = selected_index
+
+    for ce_id, entry in (buffered or {}).items():
+        answers[ce_id].update(entry["answers"])
+
+    # One answer key for the whole batch
+    question_ids = {qid for ce in attempts for qid in (ce.question_ids or [])}
+    answer_key = exam.load_answer_key(db, list(question_ids))
+
+    graded = []
+    for ce in attempts:
+        ce.answers = answers[ce.id]
+        flag_modified(ce, "answers")
+        result = exam.grade_answers(ce.question_ids, ce.answers, answer_key)
+        graded.append((ce, result))
+        ce.score = result["percent"]
+        ce.time_elapsed = ce.time_allowed_secs
+        ce.ended_at = ce.deadline_at or datetime.utcnow()
+        ce.status = "timed_out"
+
+    db.query(models.CandidateAnswer).filter(
+        models.CandidateAnswer.candidate_exam_id.in_(ids)
+    ).delete(synchronize_session=False)
+    item_stats.record_attempts(db, graded)
+
+
+def sweep(limit: int = EXPIRY_BATCH_SIZE) -> int:
+    """Time out one batch of expired attempts; returns how many were closed."""
+    db = SessionLocal()
+    try:
+        attempts = claim_expired(db, limit)
+        ids = [ce.id for ce in attempts]  # rows are expired (and detached) after commit
+        time_out_attempts(db, attempts, answer_buffer.overlay(ids))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if answer_buffer.ENABLED:
+        answer_buffer.discard(ids)
+    return len(ids)
+
+
+class ExpirySweeper:
+    def __init__(self, batch_size: int = EXPIRY_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="exam-expiry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                closed = sweep(self.batch_size)
+                if closed:
+                    print(f"⏰ Timed out {closed} expired attempts")
+            except Exception as e:
+                print(f"❌ Expiry sweep error: {e}")
+                closed = 0
+
+            # A full batch means there is likely more to close right away
+            if closed < self.batch_size:
+                self._stop.wait(EXPIRY_POLL_SECS)
+
+
+if __name__ == "__main__":
+    sweeper = ExpirySweeper()
+    sweeper.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        sweeper.stop()
@@ -0,0 +1,269 @@
+# backend/app/export.py
+"""Streaming exports of attempts and per-question responses.
+
+Rows come from a server-side cursor (``yield_per``) and leave as chunked
+CSV or as Parquet row groups, so memory stays flat however many attempts
+match. Each export opens its own replica session, which lives as long as
+the response body is being streamed.
+"""
+import io
+import os
+import csv
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import func
+from .db import ReadSessionLocal
+from . import models
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
+GRADED_STATUSES = ["completed", "timed_out"]
+
+ATTEMPT_COLUMNS = [
+    "candidate_exam_id", "candidate_email", "candidate_name", "exam_id", "exam_title",
+    "exam_language", "status", "score", "started_at", "ended_at", "time_elapsed"
+]
+RESPONSE_COLUMNS = [
+    "candidate_exam_id", "candidate_email", "exam_id", "position", "question_id",
+    "selected_index", "answer_index", "is_correct"
+]
+
+
+def attempt_filters(
+    status: Optional[List[str]] = None,
+    exam_id: Optional[List[str]] = None,
+    language: Optional[str] = None,
+    started_from: Optional[datetime] = None,
+    started_to: Optional[datetime] = None
+) -> list:
+    """WHERE clauses shared by the results page and the exports (Exam must be joined)."""
+    CE = models.CandidateExam
+    filters = []
+    if status:
+        filters.append(CE.status.in_(status))
+    if exam_id:
+        filters.append(CE.exam_id.in_(exam_id))
+    if language:
+        filters.append(func.lower(models.Exam.language) == language.strip().lower())
+    if started_from:
+        filters.append(CE.started_at >= started_from)
+    if started_to:
+        filters.append(CE.started_at < started_to)
+    return filters
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _attempt_chunks(filters: list) -> Iterator[List[dict]]:
+    CE = models.CandidateExam
+    db = ReadSessionLocal()
+    try:
+        query = db.query(
+            CE.id, CE.exam_id, CE.status, CE.score, CE.started_at, CE.ended_at, CE.time_elapsed,
+            models.User.email, models.User.name, models.Exam.title, models.Exam.language
+        ).select_from(CE).join(
+            models.User, models.User.id == CE.user_id
+        ).join(
+            models.Exam, models.Exam.id == CE.exam_id
+        ).filter(*filters).order_by(CE.started_at, CE.id).yield_per(EXPORT_CHUNK_ROWS)
+
+        for chunk in _chunks(query, EXPORT_CHUNK_ROWS):
+            yield [
+                {
+                    "candidate_exam_id": row.id,
+                    "candidate_email": row.email,
+                    "candidate_name": row.name,
+                    "exam_id": row.exam_id,
+                    "exam_title": row.title,
+                    "exam_language": row.language,
+                    "status": row.status,
+                    "score": row.score if row.status == "completed" else None,
+                    "started_at": row.started_at,
+                    "ended_at": row.ended_at,
+                    "time_elapsed": row.time_elapsed
+                }
+                for row in chunk
+            ]
+    finally:
+        db.close()
+
+
+def _response_chunks(filters: list) -> Iterator[List[dict]]:
+    """One row per question of each graded attempt, from its answers snapshot."""
+    CE = models.CandidateExam
+    db = ReadSessionLocal()
+    try:
+        query = db.query(
+            CE.id, CE.exam_id, CE.question_ids, CE.answers, models.User.email
+        ).select_from(CE).join(
+            models.User, models.User.id == CE.user_id
+        ).join(
+            models.Exam, models.Exam.id == CE.exam_id
+        ).filter(
+            CE.status.in_(GRADED_STATUSES), *filters
+        ).order_by(CE.started_at, CE.id).yield_per(EXPORT_CHUNK_ROWS)
+
+        # Grows with the questions exported, not with the attempts
+        answer_key = {}
+
+        for chunk in _chunks(query, EXPORT_CHUNK_ROWS):
+            missing = {qid for row in chunk for qid in (row.question_ids or [])} - answer_key.keys()
+            if missing:
+                found = db.query(models.Question.id, models.Question.answer_index).filter(
+                    models.Question.id.in_(list(missing))
+                ).all()
+                answer_key.update({qid: answer_index for qid, answer_index in found})
+                # Deleted questions: remember them too so they aren't fetched again
+                answer_key.update({qid: None for qid in missing - answer_key.keys()})
+
+            rows = []
+            for row in chunk:
+                answers = row.answers or {}
+                for position, qid in enumerate(row.question_ids or []):
+                    selected = answers.get(str(qid))
+                    key = answer_key.get(qid)
+                    rows.append({
+                        "candidate_exam_id": row.id,
+                        "candidate_email": row.email,
+                        "exam_id": row.exam_id,
+                        "position": position,
+                        "question_id": qid,
+                        "selected_index": selected,
+                        "answer_index": key,
+                        "is_correct": selected is not None and key is not None and selected == key
+                    })
+            yield rows
+    finally:
+        db.close()
+
+
+# WRITERS
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(chunks: Iterator[List[dict]], columns: List[str]) -> Iterator[bytes]:
+    """Header, then one encoded block per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([_csv_value(row[c]) for c in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed on the server")
+
+
+def stream_parquet(chunks: Iterator[List[dict]], schema) -> Iterator[bytes]:
+    """One Parquet row group per chunk of rows, sent as soon as it is written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()  # footer
+
+
+def attempts_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("candidate_exam_id", pa.string()),
+        ("candidate_email", pa.string()),
+        ("candidate_name", pa.string()),
+        ("exam_id", pa.string()),
+        ("exam_title", pa.string()),
+        ("exam_language", pa.string()),
+        ("status", pa.string()),
+        ("score", pa.int32()),
+        ("started_at", pa.timestamp("us", tz="UTC")),
+        ("ended_at", pa.timestamp("us", tz="UTC")),
+        ("time_elapsed", pa.int32()),
+    ])
+
+
+def responses_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("candidate_exam_id", pa.string()),
+        ("candidate_email", pa.string()),
+        ("exam_id", pa.string()),
+        ("position", pa.int32()),
+        ("question_id", pa.string()),
+        ("selected_index", pa.int32()),
+        ("answer_index", pa.int32()),
+        ("is_correct", pa.bool_()),
+    ])
+
+
+def export_stream(kind: str, fmt: str, filters: list) -> Iterator[bytes]:
+    """Body of an export of ``kind`` (attempts/responses) in ``fmt`` (csv/parquet)."""
+    if kind == "attempts":
+        chunks, columns, schema = _attempt_chunks(filters), ATTEMPT_COLUMNS, attempts_schema
+    else:
+        chunks, columns, schema = _response_chunks(filters), RESPONSE_COLUMNS, responses_schema
+
+    if fmt == "parquet":
+        _require_pyarrow()
+        return stream_parquet(chunks, schema())
+    return stream_csv(chunks, columns)
@@ -0,0 +1,174 @@
+# backend/app/hashing.py
+"""Argon2 hashing and verification in a bounded process pool.
+
+argon2 is CPU-bound, so running it in the request threadpool lets a login
+burst starve every other endpoint. Work is sent to a dedicated pool
+instead; when too much is already queued, callers get HashPoolBusy at once
+rather than waiting. Login and register await the *_async variants, so a
+queued hash holds no threadpool thread either; the sync variants block
+their caller and are for scripts and rare admin paths. The pool is only
+started by warm_up() (the app's startup hook); until then, and in scripts
+like create_db.py, hashing runs inline (in a worker thread for the async
+variants).
+"""
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", str(os.cpu_count() or 1)))  # 0 = hash inline
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(max(HASH_POOL_SIZE, 1) * 8)))
+HASH_RETRY_AFTER_SECS = int(os.getenv("HASH_RETRY_AFTER_SECS", "2"))
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = 0
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "completed": 0,
+    "rejected": 0,
+    "queue_wait_secs_total": 0.0,
+    "queue_wait_secs_max": 0.0,
+    "hash_secs_total": 0.0,
+    "hash_secs_max": 0.0,
+}
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+def _run(op: str, *args):
+    # Executed in a worker process
+    started = time.time()
+    if op == "hash":
+        result = pwd_context.hash(*args)
+    else:
+        result = pwd_context.verify(*args)
+    return result, started, time.time()
+
+
+def _start_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=HASH_POOL_SIZE,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pool
+
+
+def _record(submitted: float, started: float, finished: float):
+    wait = max(started - submitted, 0.0)
+    spent = finished - started
+    with _metrics_lock:
+        _metrics["completed"] += 1
+        _metrics["queue_wait_secs_total"] += wait
+        _metrics["queue_wait_secs_max"] = max(_metrics["queue_wait_secs_max"], wait)
+        _metrics["hash_secs_total"] += spent
+        _metrics["hash_secs_max"] = max(_metrics["hash_secs_max"], spent)
+
+
+def _admit():
+    """The pool with a queue slot taken, or None to hash inline."""
+    global _pending
+    with _pool_lock:
+        pool = _pool
+        if pool is not None:
+            if _pending >= HASH_QUEUE_LIMIT:
+                with _metrics_lock:
+                    _metrics["rejected"] += 1
+                raise HashPoolBusy()
+            _pending += 1
+    return pool
+
+
+def _release():
+    global _pending
+    with _pool_lock:
+        _pending -= 1
+
+
+def _submit(op: str, *args):
+    pool = _admit()
+    submitted = time.time()
+    if pool is None:
+        # Pool disabled or not started (scripts, tests): hash in this thread
+        result, started, finished = _run(op, *args)
+        _record(submitted, started, finished)
+        return result
+
+    try:
+        result, started, finished = pool.submit(_run, op, *args).result()
+        _record(submitted, started, finished)
+        return result
+    finally:
+        _release()
+
+
+async def _submit_async(op: str, *args):
+    pool = _admit()
+    submitted = time.time()
+    if pool is None:
+        result, started, finished = await asyncio.to_thread(_run, op, *args)
+        _record(submitted, started, finished)
+        return result
+
+    try:
+        result, started, finished = await asyncio.wrap_future(pool.submit(_run, op, *args))
+        _record(submitted, started, finished)
+        return result
+    finally:
+        _release()
+
+
+def hash_password(password: str) -> str:
+    return _submit("hash", password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _submit("verify", plain, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _submit_async("hash", password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _submit_async("verify", plain, hashed)
+
+
+def warm_up():
+    """Start the worker processes ahead of the first login burst."""
+    if HASH_POOL_SIZE > 0:
+        pool = _start_pool()
+        for f in [pool.submit(time.time) for _ in range(HASH_POOL_SIZE)]:
+            f.result()
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def get_metrics() -> dict:
+    with _metrics_lock:
+        m = dict(_metrics)
+    with _pool_lock:
+        m["in_flight"] = _pending
+    completed = m["completed"] or 1
+    m["pool_size"] = HASH_POOL_SIZE
+    m["queue_limit"] = HASH_QUEUE_LIMIT
+    m["queue_wait_secs_avg"] = m["queue_wait_secs_total"] / completed
+    m["hash_secs_avg"] = m["hash_secs_total"] / completed
+    return m
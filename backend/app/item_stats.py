@@ -0,0 +1,235 @@
+# backend/app/item_stats.py
+"""Per-question item analysis: p-value, point-biserial and distractor counts.
+
+Counters are incremented in the transaction that grades an attempt (submit
+and the expiry sweeper), so reading an exam's stats is O(questions). The
+NumPy batch job rebuilds an exam's counters from its graded attempts:
+
+    python -m backend.app.item_stats recompute [--exam-id ID]
+
+A recompute replaces the counters, so attempts graded while it runs may be
+missed; run it when the exam is quiet (or again afterwards).
+
+Both paths count a negative selected index as unanswered. Indexes past a
+question's choices are counted but left out of choice_counts when read,
+so they show up as omitted either way.
+"""
+import math
+import argparse
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from .db import SessionLocal, upsert_increment
+from . import models, exam
+
+GRADED_STATUSES = ("completed", "timed_out")
+COUNTERS = ["attempts", "correct", "score_sum", "score_sq_sum", "correct_score_sum"]
+
+
+def record_attempts(db: Session, graded: List[Tuple[models.CandidateExam, dict]]):
+    """Add graded attempts to the counters (not committed).
+
+    ``graded`` pairs each attempt with its grade_answers() result. The raw
+    score used for point-biserial is the attempt's number of correct answers.
+    """
+    stats = {}
+    choices = {}
+    for candidate_exam, result in graded:
+        score = result["correct"]
+        answers = candidate_exam.answers or {}
+        for qid, ok in zip(candidate_exam.question_ids or [], result["is_correct"]):
+            key = (candidate_exam.exam_id, qid)
+            row = stats.get(key)
+            if row is None:
+                row = stats[key] = dict(exam_id=key[0], question_id=qid, **{c: 0 for c in COUNTERS})
+            row["attempts"] += 1
+            row["score_sum"] += score
+            row["score_sq_sum"] += score * score
+            if ok:
+                row["correct"] += 1
+                row["correct_score_sum"] += score
+
+            selected = answers.get(str(qid))
+            if selected is not None and selected >= 0:
+                choice_key = key + (selected,)
+                choices[choice_key] = choices.get(choice_key, 0) + 1
+
+    if stats:
+        upsert_increment(
+            db, models.ItemStat, list(stats.values()),
+            index_elements=["exam_id", "question_id"], increment_columns=COUNTERS
+        )
+    if choices:
+        upsert_increment(db, models.ItemChoiceCount, [
+            {"exam_id": exam_id, "question_id": qid, "choice_index": index, "count": count}
+            for (exam_id, qid, index), count in choices.items()
+        ], index_elements=["exam_id", "question_id", "choice_index"], increment_columns=["count"])
+
+
+def p_value(attempts: int, correct: int) -> Optional[float]:
+    return correct / attempts if attempts else None
+
+
+def point_biserial(
+    attempts: int, correct: int, score_sum: int, score_sq_sum: int, correct_score_sum: int
+) -> Optional[float]:
+    """Correlation between answering this item correctly and the raw score.
+
+    Undefined (None) when everyone or no one got it right, or scores don't vary.
+    """
+    if not attempts or correct in (0, attempts):
+        return None
+
+    mean = score_sum / attempts
+    variance = score_sq_sum / attempts - mean * mean
+    if variance <= 1e-12:
+        return None
+
+    p = correct / attempts
+    mean_correct = correct_score_sum / correct
+    return (mean_correct - mean) / math.sqrt(variance) * math.sqrt(p / (1 - p))
+
+
+def exam_item_stats(db: Session, exam_id: str) -> List[dict]:
+    """Stats of every question of an exam, in exam order, from the counters."""
+    questions = exam.load_questions(db, exam.exam_question_ids(db, exam_id))
+
+    stats = {
+        row.question_id: row
+        for row in db.query(models.ItemStat).filter(models.ItemStat.exam_id == exam_id)
+    }
+    choices = {}
+    for qid, index, count in db.query(
+        models.ItemChoiceCount.question_id,
+        models.ItemChoiceCount.choice_index,
+        models.ItemChoiceCount.count
+    ).filter(models.ItemChoiceCount.exam_id == exam_id):
+        choices.setdefault(qid, {})[index] = count
+
+    items = []
+    for position, question in enumerate(questions):
+        row = stats.get(question.id)
+        counters = {c: getattr(row, c) if row else 0 for c in COUNTERS}
+        picked = choices.get(question.id, {})
+        choice_counts = [picked.get(i, 0) for i in range(len(question.choices or []))]
+
+        items.append({
+            "question_id": question.id,
+            "position": position,
+            "text": question.text,
+            "answer_index": question.answer_index,
+            "attempts": counters["attempts"],
+            "correct": counters["correct"],
+            "p_value": p_value(counters["attempts"], counters["correct"]),
+            "point_biserial": point_biserial(**counters),
+            "choice_counts": choice_counts,
+            "omitted": counters["attempts"] - sum(choice_counts)
+        })
+    return items
+
+
+# BATCH RECOMPUTE
+
+def recompute(db: Session, exam_id: str) -> int:
+    """Rebuild an exam's counters from all its graded attempts (not committed).
+
+    Attempts are loaded into an attempts x questions matrix of selected
+    indexes and every counter is a column reduction. Returns the attempts used.
+    """
+    import numpy as np  # only the batch job needs NumPy
+
+    CE = models.CandidateExam
+    attempts = db.query(CE.question_ids, CE.answers).filter(
+        CE.exam_id == exam_id,
+        CE.status.in_(GRADED_STATUSES)
+    ).all()
+
+    columns = {}
+    for question_ids, _ in attempts:
+        for qid in question_ids or []:
+            columns.setdefault(qid, len(columns))
+    question_ids = list(columns)
+
+    db.query(models.ItemStat).filter(models.ItemStat.exam_id == exam_id).delete(synchronize_session=False)
+    db.query(models.ItemChoiceCount).filter(
+        models.ItemChoiceCount.exam_id == exam_id
+    ).delete(synchronize_session=False)
+    if not attempts or not question_ids:
+        return 0
+
+    NOT_ASKED, UNANSWERED = -2, -1
+    selected = np.full((len(attempts), len(question_ids)), NOT_ASKED, dtype=np.int32)
+    for i, (attempt_qids, answers) in enumerate(attempts):
+        answers = answers or {}
+        for qid in attempt_qids or []:
+            index = answers.get(str(qid))
+            selected[i, columns[qid]] = UNANSWERED if index is None or index < 0 else index
+
+    answer_key = exam.load_answer_key(db, question_ids)
+    # Questions missing from the bank never match, like in grade_answers
+    key = np.array([answer_key.get(qid, NOT_ASKED - 1) for qid in question_ids], dtype=np.int32)
+
+    asked = selected != NOT_ASKED
+    correct = selected == key
+    scores = correct.sum(axis=1).astype(np.int64)
+
+    item_attempts = asked.sum(axis=0)
+    item_correct = correct.sum(axis=0)
+    score_sum = scores @ asked
+    score_sq_sum = (scores * scores) @ asked
+    correct_score_sum = scores @ correct
+
+    db.bulk_insert_mappings(models.ItemStat, [
+        {
+            "exam_id": exam_id,
+            "question_id": qid,
+            "attempts": int(item_attempts[j]),
+            "correct": int(item_correct[j]),
+            "score_sum": int(score_sum[j]),
+            "score_sq_sum": int(score_sq_sum[j]),
+            "correct_score_sum": int(correct_score_sum[j])
+        }
+        for j, qid in enumerate(question_ids)
+        if item_attempts[j]
+    ])
+
+    max_choice = int(selected.max())
+    choice_rows = []
+    for index in range(max_choice + 1):
+        counts = (selected == index).sum(axis=0)
+        choice_rows.extend(
+            {"exam_id": exam_id, "question_id": qid, "choice_index": index, "count": int(counts[j])}
+            for j, qid in enumerate(question_ids)
+            if counts[j]
+        )
+    db.bulk_insert_mappings(models.ItemChoiceCount, choice_rows)
+
+    return len(attempts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Item-analysis statistics")
+    parser.add_argument("command", choices=["recompute"])
+    parser.add_argument("--exam-id", help="Only this exam (default: every exam with graded attempts)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.exam_id:
+            exam_ids = [args.exam_id]
+        else:
+            exam_ids = [
+                exam_id for (exam_id,) in db.query(models.CandidateExam.exam_id).filter(
+                    models.CandidateExam.status.in_(GRADED_STATUSES)
+                ).distinct()
+            ]
+
+        for exam_id in exam_ids:
+            used = recompute(db, exam_id)
+            db.commit()
+            print(f"✅ Exam {exam_id}: item stats rebuilt from {used} attempts")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# backend/app/jobs.py
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy.orm import Session
+from .db import SessionLocal
+from . import models, schemas, exam, bank
+
+MAX_JOB_WORKERS = int(os.getenv("EXAM_JOB_WORKERS", "2"))
+MAX_STORED_ERRORS = 20
+
+_executor = ThreadPoolExecutor(max_workers=MAX_JOB_WORKERS, thread_name_prefix="exam-job")
+
+
+def submit_exam_job(db: Session, exam_data: schemas.ExamCreateIn, created_by: str) -> models.ExamJob:
+    job = models.ExamJob(
+        title=exam_data.title,
+        language=exam_data.language,
+        question_count=exam_data.question_count,
+        time_allowed_secs=exam_data.time_allowed_secs,
+        created_by=created_by,
+        status="pending",
+        questions_collected=0,
+        attempts=0,
+        errors=[]
+    )
+
+    # ⚡ Fast path: the bank already covers the exam, no LLM call needed
+    bank_ids = bank.pick_questions(db, exam_data.language, exam_data.question_count)
+    if len(bank_ids) >= exam_data.question_count:
+        new_exam = exam.create_exam_with_questions(
+            db,
+            title=exam_data.title,
+            language=exam_data.language,
+            time_allowed_secs=exam_data.time_allowed_secs,
+            created_by=created_by,
+            question_ids=bank_ids
+        )
+        job.status = "completed"
+        job.questions_collected = len(bank_ids)
+        job.exam_id = new_exam.id
+        job.finished_at = datetime.utcnow()
+
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    if job.status == "pending":
+        _executor.submit(run_exam_job, job.id)
+    return job
+
+
+def _update_job(job_id: str, **fields):
+    # Short-lived session per update so no connection is held across LLM calls
+    db = SessionLocal()
+    try:
+        db.query(models.ExamJob).filter(models.ExamJob.id == job_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_exam_job(job_id: str):
+    db = SessionLocal()
+    try:
+        job = db.query(models.ExamJob).filter(models.ExamJob.id == job_id).first()
+        if not job:
+            return
+        title = job.title
+        language = job.language
+        question_count = job.question_count
+        time_allowed_secs = job.time_allowed_secs
+        created_by = job.created_by
+    finally:
+        db.close()
+
+    _update_job(job_id, status="running")
+
+    try:
+        db = SessionLocal()
+        try:
+            bank_ids = bank.pick_questions(db, language, question_count)
+        finally:
+            db.close()
+
+        shortfall = question_count - len(bank_ids)
+
+        def on_progress(collected, attempts, errors):
+            _update_job(
+                job_id,
+                questions_collected=len(bank_ids) + collected,
+                attempts=attempts,
+                errors=errors[-MAX_STORED_ERRORS:]
+            )
+
+        # 🔁 Only the shortfall goes to the LLM (imported here so app startup skips requests)
+        from . import llm
+        questions = llm.generate_questions(language, shortfall, on_progress=on_progress) if shortfall > 0 else []
+
+        db = SessionLocal()
+        try:
+            # Keep whatever was generated in the bank, even if it is not enough
+            new_ids = [q.id for q in bank.add_questions(db, language, questions)]
+            db.commit()
+
+            if len(bank_ids) + len(new_ids) < question_count:
+                raise RuntimeError(
+                    f"Could only generate {len(bank_ids) + len(new_ids)} questions after retries"
+                )
+
+            new_exam = exam.create_exam_with_questions(
+                db,
+                title=title,
+                language=language,
+                time_allowed_secs=time_allowed_secs,
+                created_by=created_by,
+                question_ids=bank_ids + new_ids
+            )
+            db.commit()
+            exam_id = new_exam.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        _update_job(
+            job_id,
+            status="completed",
+            exam_id=exam_id,
+            questions_collected=question_count,
+            finished_at=datetime.utcnow()
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+        db = SessionLocal()
+        try:
+            job = db.query(models.ExamJob).filter(models.ExamJob.id == job_id).first()
+            errors = list(job.errors or []) if job else []
+        finally:
+            db.close()
+        errors.append(str(e))
+        _update_job(
+            job_id,
+            status="failed",
+            errors=errors[-MAX_STORED_ERRORS:],
+            finished_at=datetime.utcnow()
+        )
@@ -0,0 +1,263 @@
+# backend/app/llm.py
+import os
+import re
+import json
+import codecs
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_API_URL = os.getenv("LLM_API_URL")
+BATCH_SIZE = 10
+MAX_ATTEMPTS = 30
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "5"))
+REQUEST_TIMEOUT = 90
+STREAM_CHUNK_SIZE = 4096
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Shared keep-alive session, pooled to match the batch fan-out."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCY)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+# LLM RESPONSE PARSER
+
+_SPECIAL = re.compile(r'["\\{}]')
+_FLAT_OBJECT = re.compile(r"\{[^{}]*\}", re.DOTALL)
+
+
+def _to_question(item):
+    if not isinstance(item, dict):
+        return None
+
+    q = item.get("Question")
+    opts = item.get("Options")
+    ans = item.get("Answer")
+
+    if not q or not opts or not ans or not isinstance(opts, list):
+        return None
+
+    answer_index = None
+    for i, opt in enumerate(opts):
+        if str(opt).strip() == str(ans).strip():
+            answer_index = i
+            break
+
+    if answer_index is None:
+        return None
+
+    return {
+        "question": q,
+        "options": [str(opt) for opt in opts],  # e.g. "Options": [3, 4, 5]
+        "answer_index": answer_index
+    }
+
+
+def _parse_object(text: str):
+    try:
+        items = [json.loads(text)]
+    except Exception:
+        # Malformed object: salvage any complete flat objects inside it
+        items = []
+        for block in _FLAT_OBJECT.findall(text):
+            try:
+                items.append(json.loads(block))
+            except Exception:
+                continue
+
+    return [q for q in (_to_question(item) for item in items) if q]
+
+
+class QuestionStreamParser:
+    """Incremental parser for the LLM's JSON array of questions.
+
+    ``feed()`` takes text chunks as they arrive and returns the validated
+    questions whose objects were completed by that chunk. Quotes and escapes
+    are tracked, so braces inside question text no longer split an object.
+    Anything before the first ``[`` (e.g. a markdown fence) is ignored, and a
+    truncated trailing object is never emitted.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._parts = []  # text of the open object from earlier chunks
+
+    def feed(self, chunk: str):
+        out = []
+        pos = 0
+        seg_start = 0
+        n = len(chunk)
+
+        while pos < n:
+            if self._depth == 0:
+                if not self._started:
+                    start = chunk.find("[", pos)
+                    if start == -1:
+                        return out
+                    self._started = True
+                    pos = start + 1
+                    continue
+
+                start = chunk.find("{", pos)
+                if start == -1:
+                    return out
+                seg_start = start
+                self._depth = 1
+                pos = start + 1
+                continue
+
+            if self._escape:
+                self._escape = False
+                pos += 1
+                continue
+
+            m = _SPECIAL.search(chunk, pos)
+            if m is None:
+                break
+            ch = m.group()
+            pos = m.end()
+
+            if self._in_string:
+                if ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    text = "".join(self._parts) + chunk[seg_start:pos]
+                    self._parts = []
+                    out.extend(_parse_object(text))
+
+        if self._depth > 0:
+            self._parts.append(chunk[seg_start:])
+        return out
+
+
+def parse_llm_response(raw_text: str):
+    if not raw_text:
+        return []
+    return QuestionStreamParser().feed(raw_text)
+
+
+# BATCH FETCHING
+
+
+def fetch_batch(language: str, count: int, on_question=None, stop=None):
+    """Stream one batch, passing each question to ``on_question`` on arrival.
+
+    Reading stops early once ``stop`` (a threading.Event) is set.
+    """
+    questions = []
+    parser = QuestionStreamParser()
+
+    with get_http_session().get(
+        LLM_API_URL,
+        json={
+            "questionscount": count,
+            "language": language
+        },
+        timeout=REQUEST_TIMEOUT,
+        stream=True
+    ) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"LLM API returned HTTP {response.status_code}")
+
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+
+        for chunk in itertools.chain(chunks, [None]):
+            text = decoder.decode(b"", final=True) if chunk is None else decoder.decode(chunk)
+            for q in parser.feed(text):
+                questions.append(q)
+                if on_question is not None:
+                    on_question(q)
+            if stop is not None and stop.is_set():
+                break
+
+    return questions
+
+
+def generate_questions(language: str, total: int, on_progress=None):
+    """Collect ``total`` questions using up to MAX_CONCURRENCY parallel batches.
+
+    Batches are streamed and questions merged as they arrive. Once enough
+    are in, running batches stop reading, batches that have not started are
+    cancelled and late results are dropped. May return fewer than ``total``
+    if MAX_ATTEMPTS runs out.
+
+    ``on_progress(collected, attempts, errors)`` is called after every
+    finished batch.
+    """
+    collected = []
+    errors = []
+    attempts = 0
+    in_flight = {}  # future -> requested count
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def on_question(q):
+        with lock:
+            if len(collected) < total:
+                collected.append(q)
+            if len(collected) >= total:
+                stop.set()
+
+    pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY)
+    try:
+        while not stop.is_set():
+            with lock:
+                shortfall = total - len(collected) - sum(in_flight.values())
+            while shortfall > 0 and attempts < MAX_ATTEMPTS and len(in_flight) < MAX_CONCURRENCY:
+                attempts += 1
+                batch_count = min(BATCH_SIZE, shortfall)
+                future = pool.submit(fetch_batch, language, batch_count, on_question, stop)
+                in_flight[future] = batch_count
+                shortfall -= batch_count
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                del in_flight[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(str(e))
+
+            if on_progress is not None:
+                with lock:
+                    progress = len(collected)
+                on_progress(progress, attempts, errors)
+    finally:
+        stop.set()
+        for future in in_flight:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    with lock:
+        return list(collected)
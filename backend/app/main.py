@@ -1,23 +1,23 @@
-from fastapi import FastAPI, Depends, HTTPException, Body
+from fastapi import FastAPI, Depends, HTTPException, Body, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
-from sqlalchemy import and_
-import requests
-import traceback
-import json
-import re
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, select
+import asyncio
 from datetime import datetime
-from .email_utils import send_exam_assignment_email
+from typing import List, Literal, Optional
 import os
-from dotenv import load_dotenv
-from .db import Base, engine
-from . import models, schemas, auth, exam,email_utils
+import statistics
+from .db import insert_ignore
+from .async_db import async_engine
+from . import models, schemas, auth, exam, jobs, outbox, hashing, pagination, answer_buffer, expiry, item_stats, export, serialization, content_cache
 
 # APP SETUP
 
 
-app = FastAPI(title="NMK Certification Portal")
+# Typed response models plus orjson/MessagePack encoding; see serialization.py
+app = FastAPI(title="NMK Certification Portal", default_response_class=serialization.NegotiatedResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,90 +26,91 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(serialization.ContentNegotiationMiddleware)
 
-Base.metadata.create_all(bind=engine)
+# No DDL at import: create or upgrade the schema with
+# `python -m backend.app.migrations upgrade` (create_db.py runs it too)
 
-LLM_API_URL = os.getenv("LLM_API_URL")
+EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX_ENABLED", "1") == "1"
+email_sender = outbox.OutboxSender()
 
-# LLM RESPONSE PARSER
+EXAM_EXPIRY_ENABLED = os.getenv("EXAM_EXPIRY_ENABLED", "1") == "1"
+expiry_sweeper = expiry.ExpirySweeper()
 
 
-def parse_llm_response(raw_text: str):
-    import json, re
+@app.on_event("startup")
+def start_email_sender():
+    if EMAIL_OUTBOX_ENABLED:
+        email_sender.start()
 
-    if not raw_text:
-        return []
 
-    # Remove markdown fences
-    text = re.sub(r"```json|```", "", raw_text, flags=re.IGNORECASE).strip()
+@app.on_event("startup")
+def start_hash_pool():
+    hashing.warm_up()
 
-    # Find array start
-    start = text.find("[")
-    if start == -1:
-        return []
 
-    text = text[start:]  # do NOT force closing ]
+@app.on_event("startup")
+def start_answer_flusher():
+    # Replays any journal left by a crash before serving requests
+    answer_buffer.start()
 
-    questions = []
 
-    # 🔥 Extract COMPLETE JSON OBJECTS ONLY
-    blocks = re.findall(r"\{[^{}]*\}", text, re.DOTALL)
+@app.on_event("startup")
+def start_expiry_sweeper():
+    if EXAM_EXPIRY_ENABLED:
+        expiry_sweeper.start()
 
-    for block in blocks:
-        try:
-            item = json.loads(block)
-        except Exception:
-            continue
 
-        q = item.get("Question")
-        opts = item.get("Options")
-        ans = item.get("Answer")
+@app.on_event("shutdown")
+def stop_expiry_sweeper():
+    expiry_sweeper.stop()
 
-        if not q or not opts or not ans:
-            continue
 
-        answer_index = None
-        for i, opt in enumerate(opts):
-            if str(opt).strip() == str(ans).strip():
-                answer_index = i
-                break
+@app.on_event("shutdown")
+def stop_answer_flusher():
+    answer_buffer.stop()
 
-        if answer_index is None:
-            continue
 
-        questions.append({
-            "question": q,
-            "options": opts,
-            "answer_index": answer_index
-        })
+@app.on_event("shutdown")
+def stop_email_sender():
+    email_sender.stop()
+
+
+@app.on_event("shutdown")
+def stop_hash_pool():
+    hashing.shutdown()
 
-    return questions
 
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
 
 
 # AUTH 
 
 
-@app.post("/register")
-def register(payload: schemas.RegisterIn, db: Session = Depends(auth.get_db)):
-    if auth.get_user_by_email(db, payload.email):
+# Async so that a login burst waits on the hash pool, not on threadpool threads
+
+@app.post("/register", response_model=schemas.RegisterOut)
+async def register(payload: schemas.RegisterIn, db: AsyncSession = Depends(auth.get_async_db)):
+    if await auth.get_user_by_email_async(db, payload.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user = models.User(
         email=payload.email,
         name=payload.name,
-        hashed_password=auth.get_password_hash(payload.password),
+        hashed_password=await auth.get_password_hash_async(payload.password),
         is_admin=False
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    auth.invalidate_user(user.email)
     return {"msg": "user created", "email": user.email}
 
 
 @app.post("/login", response_model=schemas.Token)
-def login(payload: dict = Body(...), db: Session = Depends(auth.get_db)):
-    user = auth.authenticate_user(db, payload.get("email"), payload.get("password"))
+async def login(payload: dict = Body(...), db: AsyncSession = Depends(auth.get_async_db)):
+    user = await auth.authenticate_user_async(db, payload.get("email"), payload.get("password"))
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
 
@@ -117,7 +118,7 @@ def login(payload: dict = Body(...), db: Session = Depends(auth.get_db)):
     return {"access_token": token, "token_type": "bearer"}
 
 
-@app.get("/me")
+@app.get("/me", response_model=schemas.UserOut)
 def me(current_user: models.User = Depends(auth.get_current_user)):
     return {
         "email": current_user.email,
@@ -129,7 +130,7 @@ def me(current_user: models.User = Depends(auth.get_current_user)):
 # ADMIN
 
 
-@app.post("/admin/exams", response_model=schemas.ExamOut)
+@app.post("/admin/exams", response_model=schemas.ExamJobOut, status_code=202)
 def create_exam(
     exam_data: schemas.ExamCreateIn,
     current_user: models.User = Depends(auth.get_current_user),
@@ -138,80 +139,26 @@ def create_exam(
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin only")
 
-    TOTAL_QUESTIONS = exam_data.question_count
-    BATCH_SIZE = 10
-    MAX_ATTEMPTS = 30
-
-    all_questions = []
-    attempts = 0
-
-    try:
-        # 🔁 Generate questions in batches
-        while len(all_questions) < TOTAL_QUESTIONS and attempts < MAX_ATTEMPTS:
-            attempts += 1
-
-            batch_count = min(BATCH_SIZE, TOTAL_QUESTIONS - len(all_questions))
-
-            response = requests.get(
-                LLM_API_URL,
-                json={
-                    "questionscount": batch_count,
-                    "language": exam_data.language
-                },
-                timeout=90
-            )
-
-            if response.status_code != 200:
-                continue
+    # 🔁 Questions are generated by a background worker; poll the job for progress
+    return jobs.submit_exam_job(db, exam_data, current_user.id)
 
-            batch_questions = parse_llm_response(response.text)
 
-            if not batch_questions:
-                continue
-
-            all_questions.extend(batch_questions)
-
-        # ✅ FINAL CHECK (AFTER LOOP)
-        if len(all_questions) < TOTAL_QUESTIONS:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Could only generate {len(all_questions)} questions after retries"
-            )
-
-        llm_questions = all_questions[:TOTAL_QUESTIONS]
-
-        # 🧾 Create Exam ONCE
-        new_exam = models.Exam(
-            title=exam_data.title,
-            language=exam_data.language,
-            question_count=len(llm_questions),
-            time_allowed_secs=exam_data.time_allowed_secs,
-            created_by=current_user.id,
-            is_active=True
-        )
-        db.add(new_exam)
-        db.flush()
-
-        # 🧾 Insert Questions
-        for q in llm_questions:
-            db.add(models.Question(
-                text=q["question"],
-                choices=q["options"],
-                answer_index=q["answer_index"],
-                exam_id=new_exam.id
-            ))
-
-        db.commit()
-        db.refresh(new_exam)
-        return new_exam
+@app.get("/admin/exam-jobs/{job_id}", response_model=schemas.ExamJobOut)
+def get_exam_job(
+    job_id: str,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
 
-    except Exception as e:
-        db.rollback()
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e))
+    job = db.query(models.ExamJob).filter(models.ExamJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
-@app.post("/admin/exams/{exam_id}/assign")
+@app.post("/admin/exams/{exam_id}/assign", response_model=schemas.ExamAssignOut)
 def assign_exam(
     exam_id: str,
     payload: schemas.ExamAssignIn,
@@ -231,166 +178,345 @@ def assign_exam(
     if not exam_obj:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    DEFAULT_PASSWORD = os.getenv("DEFAULT_PASSWORD")
-
-
-    assigned_count = 0
-    emailed_count = 0
-    created_users = 0
-
-    for email in payload.candidate_emails:
-        email = email.strip().lower()
-
-        # 🔍 Check if user exists
-        candidate = auth.get_user_by_email(db, email)
-
-        # 🆕 CREATE USER IF NOT EXISTS
-        if not candidate:
-            username = email.split("@")[0]
-
-            hashed_password = auth.get_password_hash(DEFAULT_PASSWORD)
-
-            candidate = models.User(
-                email=email,
-                name=username,
-                hashed_password=hashed_password,
-                is_admin=False
-            )
+    DEFAULT_PASSWORD = os.getenv("DEFAULT_PASSWORD") or os.getenv("DEFAULT_CANDIDATE_PASSWORD")
 
-            db.add(candidate)
-            db.flush()  # get user.id
-            created_users += 1
+    # Normalise and de-duplicate, keeping the admin's order
+    emails = list(dict.fromkeys(e.strip().lower() for e in payload.candidate_emails))
 
-            print(f"👤 Auto-created user: {email}")
+    # 🔍 Resolve existing users and assignments with one query each
+    existing_users = {
+        email for (email,) in db.query(models.User.email).filter(
+            models.User.email.in_(emails)
+        )
+    }
+    existing_assignments = {
+        email for (email,) in db.query(models.ExamAssignment.candidate_email).filter(
+            models.ExamAssignment.exam_id == exam_id,
+            models.ExamAssignment.candidate_email.in_(emails)
+        )
+    }
 
-        # 🔍 Check assignment
-        existing = db.query(models.ExamAssignment).filter(
-            and_(
-                models.ExamAssignment.exam_id == exam_id,
-                models.ExamAssignment.candidate_email == email
-            )
-        ).first()
-
-        if not existing:
-            assignment = models.ExamAssignment(
-                exam_id=exam_id,
-                candidate_email=email,
-                assigned_by=current_user.id,
-                status="assigned"
-            )
-            db.add(assignment)
-            assigned_count += 1
-
-        # 📧 SEND EMAIL (ALWAYS)
-        try:
-            print(f"📧 Sending email to {email}")
-            send_exam_assignment_email(
-                to_email=email,
-                exam_title=exam_obj.title
-            )
-            emailed_count += 1
-        except Exception as e:
-            print(f"❌ Email failed for {email}: {e}")
+    # 🆕 CREATE MISSING USERS, all sharing one hash of the default password
+    new_user_emails = [e for e in emails if e not in existing_users]
+    created_users = 0
+    if new_user_emails:
+        hashed_password = auth.get_password_hash(DEFAULT_PASSWORD)
+        created_users = insert_ignore(db, models.User, [
+            {
+                "id": models.gen_id(),
+                "email": email,
+                "name": email.split("@")[0],
+                "hashed_password": hashed_password,
+                "is_admin": False
+            }
+            for email in new_user_emails
+        ], index_elements=["email"])
+        for email in new_user_emails:
+            auth.invalidate_user(email)
+
+    assigned_count = insert_ignore(db, models.ExamAssignment, [
+        {
+            "id": models.gen_id(),
+            "exam_id": exam_id,
+            "candidate_email": email,
+            "assigned_by": current_user.id,
+            "status": "assigned"
+        }
+        for email in emails if email not in existing_assignments
+    ], index_elements=["exam_id", "candidate_email"])
+
+    # 📧 QUEUE EMAIL (ALWAYS), sent by the outbox worker after commit
+    for email in emails:
+        outbox.enqueue_email(
+            db,
+            to_email=email,
+            template="exam_assignment",
+            exam_title=exam_obj.title
+        )
+    queued_count = len(emails)
 
     db.commit()
 
     return {
         "new_users_created": created_users,
         "new_assignments": assigned_count,
-        "emails_sent": emailed_count
+        "emails_queued": queued_count
     }
 
 
 
 
 
-@app.get("/admin/candidates/results")
+@app.get("/admin/candidates/results", response_model=schemas.CandidateResultsPage)
 def get_all_candidate_results(
+    status: Optional[List[str]] = Query(None),
+    exam_id: Optional[List[str]] = Query(None),
+    language: Optional[str] = None,
+    started_from: Optional[datetime] = None,
+    started_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(auth.get_db)
+    db: Session = Depends(auth.get_read_db)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin only")
 
-    # Get all candidate exams with user and exam details
-    results = []
-    candidate_exams = db.query(models.CandidateExam).all()
-    
-    for ce in candidate_exams:
-        user = db.query(models.User).filter(models.User.id == ce.user_id).first()
-        exam = db.query(models.Exam).filter(models.Exam.id == ce.exam_id).first()
-        
-        if user and exam:
-            results.append({
-                "candidate_exam_id": ce.id,
-                "candidate_email": user.email,
-                "candidate_name": user.name,
-                "exam_title": exam.title,
-                "exam_language": exam.language,
-                "status": ce.status,
-                "score": ce.score if ce.status == "completed" else None,
-                "started_at": ce.started_at,
-                "ended_at": ce.ended_at,
-                "time_elapsed": ce.time_elapsed
-            })
-    
-    return results
+    CE = models.CandidateExam
+    filters = export.attempt_filters(status, exam_id, language, started_from, started_to)
+
+    def joined(query):
+        return query.join(models.User, models.User.id == CE.user_id).join(
+            models.Exam, models.Exam.id == CE.exam_id
+        ).filter(*filters)
+
+    # Newest first; keyset on (started_at, id) so deep pages stay cheap
+    page_query = joined(db.query(
+        CE.id, CE.exam_id, CE.status, CE.score, CE.started_at, CE.ended_at, CE.time_elapsed,
+        models.User.email, models.User.name, models.Exam.title, models.Exam.language
+    ).select_from(CE))
+    if cursor:
+        page_query = page_query.filter(pagination.before_cursor(db, CE.started_at, CE.id, cursor))
+    rows = page_query.order_by(CE.started_at.desc(), CE.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pagination.encode_cursor(rows[-1].started_at, rows[-1].id)
+
+    items = [
+        {
+            "candidate_exam_id": row.id,
+            "candidate_email": row.email,
+            "candidate_name": row.name,
+            "exam_id": row.exam_id,
+            "exam_title": row.title,
+            "exam_language": row.language,
+            "status": row.status,
+            "score": row.score if row.status == "completed" else None,
+            "started_at": row.started_at,
+            "ended_at": row.ended_at,
+            "time_elapsed": row.time_elapsed
+        }
+        for row in rows
+    ]
+
+    summary = None
+    if not cursor:
+        total, completed, in_progress, timed_out, avg_score = joined(db.query(
+            func.count(CE.id),
+            func.sum(case((CE.status == "completed", 1), else_=0)),
+            func.sum(case((CE.status == "in_progress", 1), else_=0)),
+            func.sum(case((CE.status == "timed_out", 1), else_=0)),
+            func.avg(case((CE.status == "completed", CE.score)))
+        ).select_from(CE)).one()
+        summary = {
+            "total": total or 0,
+            "completed": completed or 0,
+            "in_progress": in_progress or 0,
+            "timed_out": timed_out or 0,
+            "avg_score": float(avg_score) if avg_score is not None else None
+        }
+
+    return {"items": items, "next_cursor": next_cursor, "summary": summary}
+
+
+@app.get("/admin/exports/{kind}", response_class=StreamingResponse)
+def export_results(
+    kind: str,
+    fmt: Literal["csv", "parquet"] = Query("csv", alias="format"),
+    status: Optional[List[str]] = Query(None),
+    exam_id: Optional[List[str]] = Query(None),
+    language: Optional[str] = None,
+    started_from: Optional[datetime] = None,
+    started_to: Optional[datetime] = None,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Stream attempts, or per-question responses of graded attempts, as CSV or Parquet."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
+    if kind not in ("attempts", "responses"):
+        raise HTTPException(status_code=404, detail="Unknown export")
+
+    filters = export.attempt_filters(status, exam_id, language, started_from, started_to)
+    body = export.export_stream(kind, fmt, filters)
+
+    media_type = "application/vnd.apache.parquet" if fmt == "parquet" else "text/csv; charset=utf-8"
+    filename = f"{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/admin/exams/summary", response_model=List[schemas.ExamSummaryOut])
+def get_exams_summary(
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_read_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    CE = models.CandidateExam
+    EA = models.ExamAssignment
+    completed_score = case((CE.status == "completed", CE.score))
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    assigned = db.query(
+        EA.exam_id.label("exam_id"),
+        func.count(EA.id).label("assigned")
+    ).group_by(EA.exam_id).subquery()
+
+    attempt_columns = [
+        CE.exam_id.label("exam_id"),
+        func.count(CE.id).label("started"),
+        func.sum(case((CE.status == "in_progress", 1), else_=0)).label("in_progress"),
+        func.sum(case((CE.status == "completed", 1), else_=0)).label("completed"),
+        func.sum(case((CE.status == "timed_out", 1), else_=0)).label("timed_out"),
+        func.avg(completed_score).label("avg_score"),
+    ]
+    if is_postgres:
+        # percentile_cont skips the NULLs of non-completed attempts
+        attempt_columns.append(
+            func.percentile_cont(0.5).within_group(completed_score).label("median_score")
+        )
+    attempts = db.query(*attempt_columns).group_by(CE.exam_id).subquery()
+
+    rows = db.query(
+        models.Exam.id, models.Exam.title, models.Exam.language, models.Exam.is_active,
+        assigned.c.assigned, attempts
+    ).outerjoin(
+        assigned, assigned.c.exam_id == models.Exam.id
+    ).outerjoin(
+        attempts, attempts.c.exam_id == models.Exam.id
+    ).order_by(models.Exam.created_at.desc()).all()
+
+    medians = {}
+    if not is_postgres:
+        # SQLite (local runs) has no percentile_cont
+        scores = {}
+        for exam_id, score in db.query(CE.exam_id, CE.score).filter(CE.status == "completed"):
+            scores.setdefault(exam_id, []).append(score)
+        medians = {exam_id: statistics.median(values) for exam_id, values in scores.items()}
+
+    return [
+        {
+            "exam_id": row.id,
+            "title": row.title,
+            "language": row.language,
+            "is_active": row.is_active,
+            "assigned": row.assigned or 0,
+            "started": row.started or 0,
+            "in_progress": row.in_progress or 0,
+            "completed": row.completed or 0,
+            "timed_out": row.timed_out or 0,
+            "avg_score": float(row.avg_score) if row.avg_score is not None else None,
+            "median_score": (
+                float(row.median_score) if is_postgres and row.median_score is not None
+                else medians.get(row.id)
+            )
+        }
+        for row in rows
+    ]
 
 
-@app.get("/admin/exams/{exam_id}/assignments")
+@app.get("/admin/exams/{exam_id}/assignments", response_model=schemas.ExamAssignmentsPage)
 def get_exam_assignments(
     exam_id: str,
+    status: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(auth.get_db)
+    db: Session = Depends(auth.get_read_db)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin only")
 
-    assignments = db.query(models.ExamAssignment).filter(
-        models.ExamAssignment.exam_id == exam_id
-    ).all()
-    
-    result = []
-    for assignment in assignments:
-        # Check if candidate has started/completed the exam
-        candidate_exam = db.query(models.CandidateExam).filter(
-            and_(
-                models.CandidateExam.exam_id == exam_id,
-                models.CandidateExam.user_id.in_(
-                    db.query(models.User.id).filter(
-                        models.User.email == assignment.candidate_email
-                    )
-                )
-            )
-        ).first()
-        
-        status = "assigned"
-        score = None
-        if candidate_exam:
-            status = candidate_exam.status
-            score = candidate_exam.score if candidate_exam.status == "completed" else None
-        
-        result.append({
-            "candidate_email": assignment.candidate_email,
-            "assigned_at": assignment.assigned_at,
-            "status": status,
-            "score": score
-        })
-    
-    return result
+    CE = models.CandidateExam
+    EA = models.ExamAssignment
+
+    # Each candidate's latest attempt at this exam
+    attempts = db.query(
+        CE.user_id.label("user_id"),
+        CE.status.label("status"),
+        CE.score.label("score"),
+        func.row_number().over(
+            partition_by=CE.user_id,
+            order_by=(CE.started_at.desc(), CE.id.desc())
+        ).label("rn")
+    ).filter(CE.exam_id == exam_id).subquery()
+
+    attempt_status = func.coalesce(attempts.c.status, "assigned")
+
+    query = db.query(
+        EA.id, EA.candidate_email, EA.assigned_at, attempt_status.label("status"), attempts.c.score
+    ).outerjoin(
+        models.User, models.User.email == EA.candidate_email
+    ).outerjoin(
+        attempts, and_(attempts.c.user_id == models.User.id, attempts.c.rn == 1)
+    ).filter(EA.exam_id == exam_id)
+
+    if status:
+        query = query.filter(attempt_status.in_(status))
+    if cursor:
+        query = query.filter(pagination.before_cursor(db, EA.assigned_at, EA.id, cursor))
+
+    rows = query.order_by(EA.assigned_at.desc(), EA.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pagination.encode_cursor(rows[-1].assigned_at, rows[-1].id)
+
+    return {
+        "items": [
+            {
+                "candidate_email": row.candidate_email,
+                "assigned_at": row.assigned_at,
+                "status": row.status,
+                "score": row.score if row.status == "completed" else None
+            }
+            for row in rows
+        ],
+        "next_cursor": next_cursor
+    }
 
 
 # ADMIN CONTROLS
 
 
-@app.get("/admin/exams")
-def list_all_exams(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(auth.get_db)):
+@app.get("/admin/exams/{exam_id}/item-stats", response_model=List[schemas.ItemStatOut])
+def get_exam_item_stats(
+    exam_id: str,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_read_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    if not db.query(models.Exam.id).filter(models.Exam.id == exam_id).first():
+        raise HTTPException(status_code=404, detail="Exam not found")
+
+    # Precomputed counters: cost grows with questions, not attempts
+    return item_stats.exam_item_stats(db, exam_id)
+
+
+@app.get("/admin/metrics/password-hashing", response_model=schemas.HashingMetricsOut)
+def password_hashing_metrics(current_user: models.User = Depends(auth.get_current_user)):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return hashing.get_metrics()
+
+
+@app.get("/admin/exams", response_model=List[schemas.ExamOut])
+def list_all_exams(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(auth.get_read_db)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin only")
     return db.query(models.Exam).order_by(models.Exam.created_at.desc()).all()
 
 
-@app.patch("/admin/exams/{exam_id}/toggle")
+@app.patch("/admin/exams/{exam_id}/toggle", response_model=schemas.ExamToggleOut)
 def toggle_exam_status(
     exam_id: str,
     current_user: models.User = Depends(auth.get_current_user),
@@ -411,7 +537,7 @@ def toggle_exam_status(
 # USER: EXAMS
 
 
-@app.get("/exams")
+@app.get("/exams", response_model=List[schemas.ExamOut])
 def list_available_exams(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(auth.get_db)):
     # Get exams assigned to this candidate
     assignments = db.query(models.ExamAssignment).filter(
@@ -433,42 +559,85 @@ def list_available_exams(current_user: models.User = Depends(auth.get_current_us
 
 
 
+# EXAM TAKING
+# Async endpoints on the asyncio engine (see async_db.py). Sync helpers that
+# take a Session run through db.run_sync, so they are shared with the rest.
+
+async def _own_attempt(db: AsyncSession, candidate_exam_id: str, user_id: str) -> models.CandidateExam:
+    result = await db.execute(select(models.CandidateExam).where(
+        models.CandidateExam.id == candidate_exam_id,
+        models.CandidateExam.user_id == user_id
+    ))
+    candidate_exam = result.scalars().first()
+    if not candidate_exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    return candidate_exam
+
+
+async def _buffered(candidate_exam: models.CandidateExam) -> Optional[dict]:
+    # Unflushed write-behind state of an open attempt. The buffer lock can
+    # wait on a journal fsync, so it is never taken on the event loop
+    if not answer_buffer.ENABLED or candidate_exam.status != "in_progress":
+        return None
+    return await asyncio.to_thread(answer_buffer.peek, candidate_exam.id)
+
+
+async def _active_attempt(db: AsyncSession, user_id: str) -> Optional[models.CandidateExam]:
+    result = await db.execute(select(models.CandidateExam).where(
+        models.CandidateExam.user_id == user_id,
+        models.CandidateExam.status == "in_progress"
+    ))
+    return result.scalars().first()
+
+
 @app.post("/exam/{exam_id}/start", response_model=schemas.CandidateExamCreateOut)
-def start_exam(exam_id: str, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(auth.get_db)):
+async def start_exam(
+    exam_id: str,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_async_db)
+):
     # Check if exam is assigned to this candidate
-    assignment = db.query(models.ExamAssignment).filter(
-        and_(
-            models.ExamAssignment.exam_id == exam_id,
-            models.ExamAssignment.candidate_email == current_user.email
-        )
-    ).first()
+    result = await db.execute(select(models.ExamAssignment).where(
+        models.ExamAssignment.exam_id == exam_id,
+        models.ExamAssignment.candidate_email == current_user.email
+    ))
+    assignment = result.scalars().first()
     
     if not assignment:
         raise HTTPException(status_code=403, detail="This exam is not assigned to you")
     
-    existing = db.query(models.CandidateExam).filter(
-        models.CandidateExam.user_id == current_user.id,
-        models.CandidateExam.status == "in_progress"
-    ).first()
+    existing = await _active_attempt(db, current_user.id)
 
-    if existing:
+    if existing and exam.accepts_writes(existing):
         return existing
+
+    if existing:
+        # Abandoned past its deadline and not swept yet. Lock it first, as
+        # submit does, so it isn't graded here and by the sweeper both.
+        await db.refresh(existing, with_for_update=True)
+        if existing.status == "in_progress":
+            buffered = await asyncio.to_thread(answer_buffer.overlay, [existing.id])
+            await db.run_sync(expiry.time_out_attempts, [existing], buffered)
+        else:
+            existing = None
     
-    exam_obj = db.query(models.Exam).filter(models.Exam.id == exam_id, models.Exam.is_active == True).first()
+    result = await db.execute(select(models.Exam).where(models.Exam.id == exam_id, models.Exam.is_active == True))
+    exam_obj = result.scalars().first()
     if not exam_obj:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    questions = db.query(models.Question).filter(models.Question.exam_id == exam_id).all()
-    if not questions:
+    question_ids = await db.run_sync(exam.exam_question_ids, exam_id)
+    if not question_ids:
         raise HTTPException(status_code=400, detail="No questions found")
 
     candidate_exam = models.CandidateExam(
         user_id=current_user.id,
         exam_id=exam_id,
-        question_ids=[q.id for q in questions],
+        question_ids=question_ids,
         answers={},
         time_allowed_secs=exam_obj.time_allowed_secs,
         time_elapsed=0,
+        deadline_at=exam.deadline_for(exam_obj.time_allowed_secs),
         status="in_progress"
     )
     db.add(candidate_exam)
@@ -476,133 +645,213 @@ def start_exam(exam_id: str, current_user: models.User = Depends(auth.get_curren
     # Update assignment status
     assignment.status = "started"
     
-    db.commit()
-    db.refresh(candidate_exam)
+    await db.commit()
+    if existing and answer_buffer.ENABLED:
+        await asyncio.to_thread(answer_buffer.discard, [existing.id])
+    await db.refresh(candidate_exam)
     return candidate_exam
 
-@app.get("/exam/{candidate_exam_id}")
-def get_exam(
-    candidate_exam_id: str,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(auth.get_db)
+async def _questions(db: AsyncSession, candidate_exam: models.CandidateExam) -> List[dict]:
+    # Clients that cache question content pass include_questions=false and
+    # fetch it from /exam/{id}/questions, which supports ETags and compression
+    content = await content_cache.get_content_async(db, candidate_exam.exam_id, candidate_exam.question_ids)
+    return content.questions
+
+
+# Registered before /exam/{candidate_exam_id}, which would otherwise match "resume"
+@app.get("/exam/resume", response_model=schemas.ResumeExamOut)
+async def resume_exam(
+    include_questions: bool = Query(True),
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_async_db)
 ):
-    candidate_exam = db.query(models.CandidateExam).filter(
-        models.CandidateExam.id == candidate_exam_id,
-        models.CandidateExam.user_id == current_user.id
-    ).first()
+    candidate_exam = await _active_attempt(db, current_user.id)
 
     if not candidate_exam:
-        raise HTTPException(status_code=404, detail="Exam not found")
+        raise HTTPException(status_code=404, detail="No active exam")
+
+    buffered = await _buffered(candidate_exam)
+    return {
+        "candidate_exam_id": candidate_exam.id,
+        "exam_id": candidate_exam.exam_id,
+        "questions": await _questions(db, candidate_exam) if include_questions else None,
+        "answers": await db.run_sync(exam.current_answers, candidate_exam, buffered),
+        "time_allowed_secs": candidate_exam.time_allowed_secs,
+        "time_elapsed": exam.current_time_elapsed(candidate_exam, buffered),
+        "deadline_at": candidate_exam.deadline_at,
+        "status": candidate_exam.status
+    }
 
-    questions = []
-    for qid in candidate_exam.question_ids or []:
-        question = db.query(models.Question).filter(
-            models.Question.id == qid
-        ).first()
 
-        if question:
-            questions.append({
-                "id": question.id,
-                "text": question.text,
-                "choices": question.choices
-            })
+@app.get("/exam/{candidate_exam_id}", response_model=schemas.ExamDetailOut)
+async def get_exam(
+    candidate_exam_id: str,
+    include_questions: bool = Query(True),
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_async_db)
+):
+    candidate_exam = await _own_attempt(db, candidate_exam_id, current_user.id)
 
     return {
         "id": candidate_exam.id,
-        "questions": questions,
+        "questions": await _questions(db, candidate_exam) if include_questions else None,
         "time_allowed_secs": candidate_exam.time_allowed_secs,
-        "time_elapsed": candidate_exam.time_elapsed,
+        "time_elapsed": exam.current_time_elapsed(candidate_exam, await _buffered(candidate_exam)),
+        "deadline_at": candidate_exam.deadline_at,
         "status": candidate_exam.status
     }
 
-# SAVE ANSWER
-
-@app.post("/exam/{candidate_exam_id}/save-answer")
-def save_answer(
+@app.get("/exam/{candidate_exam_id}/questions", response_model=List[schemas.CandidateQuestionOut])
+def get_exam_questions(
     candidate_exam_id: str,
-    payload: schemas.AnswerIn,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(auth.get_db)
 ):
-    candidate_exam = db.query(models.CandidateExam).filter(
+    """Question content of an attempt: cached, precompressed and ETag-validated."""
+    row = db.query(models.CandidateExam.exam_id, models.CandidateExam.question_ids).filter(
         models.CandidateExam.id == candidate_exam_id,
         models.CandidateExam.user_id == current_user.id
     ).first()
 
-    if not candidate_exam:
+    if not row:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    answers = dict(candidate_exam.answers or {})
-    answers[str(payload.question_id)] = payload.selected_index
+    content = content_cache.get_content(db, row.exam_id, row.question_ids)
+    headers = {
+        "ETag": content.etag,
+        # Content never changes for an attempt; private because it needs auth
+        "Cache-Control": "private, max-age=86400, immutable",
+        "Vary": "Accept-Encoding"
+    }
+    if content_cache.etag_matches(if_none_match, content.etag):
+        return Response(status_code=304, headers=headers)
 
-    candidate_exam.answers = answers
-    candidate_exam.time_elapsed = payload.time_elapsed
-    flag_modified(candidate_exam, "answers")
+    body, encoding = content.encoded(accept_encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    db.commit()
-    db.refresh(candidate_exam)
-    return {"msg": "answer_saved"}
+# SAVE ANSWER
 
+async def _write_rejected(db: AsyncSession, candidate_exam_id: str, user_id: str) -> HTTPException:
+    # Only reached when the guarded write matched nothing; tell the client why
+    result = await db.execute(select(models.CandidateExam.id).where(
+        models.CandidateExam.id == candidate_exam_id,
+        models.CandidateExam.user_id == user_id
+    ))
+    if not result.first():
+        return HTTPException(status_code=404, detail="Exam not found")
+    return HTTPException(status_code=409, detail="Exam is closed or its time is up")
 
-@app.get("/exam/resume")
-def resume_exam(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(auth.get_db)
-):
-    exam = db.query(models.CandidateExam).filter(
-        models.CandidateExam.user_id == current_user.id,
-        models.CandidateExam.status == "in_progress"
-    ).first()
 
-    if not exam:
-        raise HTTPException(status_code=404, detail="No active exam")
+async def _buffer_accepts(db: AsyncSession, candidate_exam_id: str, user_id: str) -> bool:
+    # Owner check for write-behind saves: one DB read per attempt, then cached.
+    # The cache shares the buffer lock, so it is read and written off the loop
+    owner = await asyncio.to_thread(answer_buffer.cached_owner, candidate_exam_id)
+    if owner is None:
+        owner = await db.run_sync(answer_buffer.load_owner, candidate_exam_id, user_id)
+        if owner is None:
+            return False
+        await asyncio.to_thread(answer_buffer.remember_owner, candidate_exam_id, owner)
+    return answer_buffer.owner_accepts(owner, user_id)
 
-    questions = []
-    for qid in exam.question_ids or []:
-        q = db.query(models.Question).filter(models.Question.id == qid).first()
-        if q:
-            questions.append({
-                "id": q.id,
-                "text": q.text,
-                "choices": q.choices
-            })
 
-    return {
-        "candidate_exam_id": exam.id,
-        "exam_id": exam.exam_id,
-        "questions": questions,
-        "answers": exam.answers or {},
-        "time_allowed_secs": exam.time_allowed_secs,
-        "time_elapsed": exam.time_elapsed,
-        "status": exam.status
-    }
+async def _save(db: AsyncSession, candidate_exam_id: str, user_id: str, answers: dict, time_elapsed: int):
+    if answer_buffer.ENABLED:
+        if not await _buffer_accepts(db, candidate_exam_id, user_id):
+            raise await _write_rejected(db, candidate_exam_id, user_id)
+        # The journal append fsyncs; keep it off the event loop
+        await asyncio.to_thread(answer_buffer.add, candidate_exam_id, answers, time_elapsed)
+        return
 
+    if not await db.run_sync(exam.record_answers, candidate_exam_id, user_id, answers, time_elapsed):
+        raise await _write_rejected(db, candidate_exam_id, user_id)
 
+    await db.commit()
 
 
-@app.post("/exam/{candidate_exam_id}/submit")
-def submit_exam(
+@app.post("/exam/{candidate_exam_id}/save-answer", response_model=schemas.AnswerSavedOut)
+async def save_answer(
     candidate_exam_id: str,
-    final_time_elapsed: int = Body(..., embed=True),
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(auth.get_db)
+    payload: schemas.AnswerIn,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_async_db)
 ):
-    candidate_exam = db.query(models.CandidateExam).filter(
-        models.CandidateExam.id == candidate_exam_id,
-        models.CandidateExam.user_id == current_user.id
-    ).first()
+    answers = {payload.question_id: payload.selected_index}
+    await _save(db, candidate_exam_id, current_user.id, answers, payload.time_elapsed)
+    return {"msg": "answer_saved"}
 
-    if not candidate_exam:
-        raise HTTPException(status_code=404, detail="Exam not found")
 
-    candidate_exam.time_elapsed = final_time_elapsed
-    candidate_exam.status = "completed"
-    candidate_exam.ended_at = datetime.utcnow()
+@app.post("/exam/{candidate_exam_id}/answers:batch", response_model=schemas.AnswersSavedOut)
+async def save_answers_batch(
+    candidate_exam_id: str,
+    payload: schemas.AnswersBatchIn,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_async_db)
+):
+    # Later entries for the same question win, as if saved one by one
+    answers = {a.question_id: a.selected_index for a in payload.answers}
+    await _save(db, candidate_exam_id, current_user.id, answers, payload.time_elapsed)
+    return {"msg": "answers_saved", "saved": len(answers)}
+
+
+def _finish_attempt(
+    db: Session,
+    candidate_exam: models.CandidateExam,
+    buffered: Optional[dict],
+    answers: Optional[List[schemas.AnswerItem]],
+    final_time_elapsed: int
+):
+    # Sync half of submit (run through run_sync): fold in answers, grade, close
+    now = datetime.utcnow()
+    on_time = exam.accepts_writes(candidate_exam, now)
 
-    exam.compute_score(db, candidate_exam)
+    if buffered:
+        exam.save_answers(db, candidate_exam.id, buffered["answers"])
+
+    # Final answer set sent inline, so submitting is a single request
+    if answers and on_time:
+        exam.save_answers(db, candidate_exam.id, {a.question_id: a.selected_index for a in answers})
+
+    exam.compact_answers(db, candidate_exam)
+
+    if candidate_exam.deadline_at is not None:
+        candidate_exam.time_elapsed = exam.server_time_elapsed(candidate_exam, now)
+    else:
+        candidate_exam.time_elapsed = final_time_elapsed
+    candidate_exam.status = "completed" if on_time else "timed_out"
+    candidate_exam.ended_at = now if on_time else candidate_exam.deadline_at
+
+    result = exam.grade_attempt(db, candidate_exam)
+    candidate_exam.score = result["percent"]
+    item_stats.record_attempts(db, [(candidate_exam, result)])
 
-    db.commit()
-    db.refresh(candidate_exam)
+
+@app.post("/exam/{candidate_exam_id}/submit", response_model=schemas.SubmitOut)
+async def submit_exam(
+    candidate_exam_id: str,
+    final_time_elapsed: int = Body(..., embed=True),
+    answers: Optional[List[schemas.AnswerItem]] = Body(None, embed=True),
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_async_db)
+):
+    candidate_exam = await _own_attempt(db, candidate_exam_id, current_user.id)
+
+    # Lock the attempt so the expiry sweeper (or a flush) can't write it at the same time
+    await db.refresh(candidate_exam, with_for_update=True)
+    if candidate_exam.status == "in_progress":
+        # Unflushed write-behind saves go into this transaction; they stay
+        # buffered until it commits, so a failed submit loses nothing
+        buffered = await _buffered(candidate_exam)
+        await db.run_sync(_finish_attempt, candidate_exam, buffered, answers, final_time_elapsed)
+        await db.commit()
+    # Otherwise already submitted or timed out: repeat the outcome
+
+    if answer_buffer.ENABLED:
+        # Both take the buffer lock, which a journal fsync can hold
+        await asyncio.to_thread(answer_buffer.discard, [candidate_exam.id])
 
     return {
         "msg": "exam_submitted",
@@ -612,34 +861,33 @@ def submit_exam(
 
 # RESULT
 
-@app.get("/exam/{candidate_exam_id}/result")
-def get_result(
+@app.get("/exam/{candidate_exam_id}/result", response_model=schemas.ResultOut)
+async def get_result(
     candidate_exam_id: str,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(auth.get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_async_db)
 ):
-    candidate_exam = db.query(models.CandidateExam).filter(
-        models.CandidateExam.id == candidate_exam_id,
-        models.CandidateExam.user_id == current_user.id
-    ).first()
-
-    if not candidate_exam:
-        raise HTTPException(status_code=404, detail="Exam not found")
+    candidate_exam = await _own_attempt(db, candidate_exam_id, current_user.id)
 
     details = []
-    answers = candidate_exam.answers or {}
-
-    for qid in candidate_exam.question_ids or []:
-        question = db.query(models.Question).filter(models.Question.id == qid).first()
-        if question:
-            selected = answers.get(str(qid))
-            details.append({
-                "question": question.text,
-                "choices": question.choices,
-                "selected": selected,
-                "correct_index": question.answer_index,
-                "is_correct": selected == question.answer_index
-            })
+    answers = await db.run_sync(exam.current_answers, candidate_exam, await _buffered(candidate_exam))
+
+    questions = await db.run_sync(exam.load_questions, candidate_exam.question_ids)
+    grade = exam.grade_answers(
+        candidate_exam.question_ids,
+        answers,
+        {q.id: q.answer_index for q in questions}
+    )
+    is_correct = dict(zip(candidate_exam.question_ids or [], grade["is_correct"]))
+
+    for question in questions:
+        details.append({
+            "question": question.text,
+            "choices": question.choices,
+            "selected": answers.get(str(question.id)),
+            "correct_index": question.answer_index,
+            "is_correct": is_correct[question.id]
+        })
 
     return {
         "score": candidate_exam.score,
@@ -0,0 +1,356 @@
+# backend/app/migrations.py
+"""Versioned schema migrations.
+
+Each migration runs once, in order, inside its own transaction, and is then
+recorded in ``schema_migrations``. Add new ones to MIGRATIONS; never edit
+or reorder a migration that has shipped. Migrations build tables from the
+frozen definitions below, never from models.py, so a fresh database goes
+through the same steps as one that has been upgraded over time. The
+baseline runs against databases that predate migrations, so it and later
+migrations tolerate objects that already exist (IF NOT EXISTS, column
+checks).
+
+    python -m backend.app.migrations upgrade   # apply pending migrations
+    python -m backend.app.migrations status
+    python -m backend.app.migrations explain   # check hot queries use indexes
+"""
+import sys
+import json
+import argparse
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, String, Integer, BigInteger, DateTime, Boolean, JSON, ForeignKey,
+    UniqueConstraint, Index, inspect, text, func
+)
+from .db import engine
+
+
+def _create_index(conn, name, table, columns, unique=False, where=None):
+    sql = f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+    if where:
+        sql += f" WHERE {where}"
+    conn.execute(text(sql))
+
+
+# FROZEN TABLES
+# Tables as the migration that creates them first defined them. Never edit
+# these to follow models.py: schema changes go in a new migration.
+
+_frozen = MetaData()
+
+BASELINE_TABLES = [
+    Table(
+        "users", _frozen,
+        Column("id", String, primary_key=True),
+        Column("email", String, nullable=False),
+        Column("name", String, nullable=True),
+        Column("hashed_password", String, nullable=False),
+        Column("is_admin", Boolean),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Index("ix_users_email", "email", unique=True),
+    ),
+    Table(
+        "exams", _frozen,
+        Column("id", String, primary_key=True),
+        Column("title", String, nullable=False),
+        Column("language", String, nullable=False),
+        Column("question_count", Integer, nullable=False),
+        Column("time_allowed_secs", Integer, nullable=False),
+        Column("created_by", String, ForeignKey("users.id"), nullable=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("is_active", Boolean),
+    ),
+    Table(
+        "questions", _frozen,
+        Column("id", String, primary_key=True),
+        Column("text", String, nullable=False),
+        Column("choices", JSON, nullable=False),
+        Column("answer_index", Integer, nullable=False),
+        Column("exam_id", String, ForeignKey("exams.id"), nullable=True),
+        Column("language", String, nullable=True),
+        Index("ix_questions_language", "language"),
+    ),
+    Table(
+        "exam_questions", _frozen,
+        Column("exam_id", String, ForeignKey("exams.id"), primary_key=True),
+        Column("question_id", String, ForeignKey("questions.id"), primary_key=True),
+        Column("position", Integer, nullable=False),
+    ),
+    Table(
+        "exam_jobs", _frozen,
+        Column("id", String, primary_key=True),
+        Column("title", String, nullable=False),
+        Column("language", String, nullable=False),
+        Column("question_count", Integer, nullable=False),
+        Column("time_allowed_secs", Integer, nullable=False),
+        Column("created_by", String, ForeignKey("users.id"), nullable=False),
+        Column("status", String),
+        Column("questions_collected", Integer),
+        Column("attempts", Integer),
+        Column("errors", JSON, nullable=True),
+        Column("exam_id", String, ForeignKey("exams.id"), nullable=True),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("finished_at", DateTime, nullable=True),
+    ),
+    Table(
+        "exam_assignments", _frozen,
+        Column("id", String, primary_key=True),
+        Column("exam_id", String, ForeignKey("exams.id"), nullable=False),
+        Column("candidate_email", String, nullable=False),
+        Column("assigned_by", String, ForeignKey("users.id"), nullable=False),
+        Column("assigned_at", DateTime(timezone=True), server_default=func.now()),
+        Column("status", String),
+        UniqueConstraint("exam_id", "candidate_email", name="uq_exam_assignments_exam_candidate"),
+    ),
+    Table(
+        "candidate_exams", _frozen,
+        Column("id", String, primary_key=True),
+        Column("user_id", String, nullable=False),
+        Column("exam_id", String, ForeignKey("exams.id"), nullable=False),
+        Column("question_ids", JSON, nullable=True),
+        Column("answers", JSON, nullable=True),
+        Column("started_at", DateTime(timezone=True), server_default=func.now()),
+        Column("ended_at", DateTime, nullable=True),
+        Column("status", String),
+        Column("time_allowed_secs", Integer),
+        Column("time_elapsed", Integer),
+        Column("score", Integer),
+    ),
+    Table(
+        "email_outbox", _frozen,
+        Column("id", String, primary_key=True),
+        Column("to_email", String, nullable=False),
+        Column("template", String, nullable=False),
+        Column("context", JSON, nullable=False),
+        Column("status", String),
+        Column("attempts", Integer),
+        Column("last_error", String, nullable=True),
+        Column("next_attempt_at", DateTime, nullable=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("sent_at", DateTime, nullable=True),
+    ),
+]
+
+CANDIDATE_ANSWERS = Table(
+    "candidate_answers", _frozen,
+    Column("candidate_exam_id", String, ForeignKey("candidate_exams.id"), primary_key=True),
+    Column("question_id", String, primary_key=True),
+    Column("selected_index", Integer, nullable=False),
+    Column("answered_at", DateTime, nullable=False),
+)
+
+ITEM_STATS = Table(
+    "item_stats", _frozen,
+    Column("exam_id", String, ForeignKey("exams.id"), primary_key=True),
+    Column("question_id", String, primary_key=True),
+    Column("attempts", Integer, nullable=False),
+    Column("correct", Integer, nullable=False),
+    Column("score_sum", BigInteger, nullable=False),
+    Column("score_sq_sum", BigInteger, nullable=False),
+    Column("correct_score_sum", BigInteger, nullable=False),
+)
+
+ITEM_CHOICE_COUNTS = Table(
+    "item_choice_counts", _frozen,
+    Column("exam_id", String, ForeignKey("exams.id"), primary_key=True),
+    Column("question_id", String, primary_key=True),
+    Column("choice_index", Integer, primary_key=True),
+    Column("count", Integer, nullable=False),
+)
+
+
+# MIGRATIONS
+
+def m0001_baseline(conn):
+    # Tables that existed before migrations were introduced
+    _frozen.create_all(bind=conn, tables=BASELINE_TABLES)
+
+
+def m0002_question_bank_and_unique_assignments(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("questions")}
+    if "language" not in columns:
+        conn.execute(text("ALTER TABLE questions ADD COLUMN language VARCHAR"))
+
+    # Bring questions of pre-bank exams into the bank
+    conn.execute(text(
+        "UPDATE questions SET language = "
+        "(SELECT lower(trim(e.language)) FROM exams e WHERE e.id = questions.exam_id) "
+        "WHERE language IS NULL AND exam_id IS NOT NULL"
+    ))
+    _create_index(conn, "ix_questions_language", "questions", "language")
+
+    # Keep the earliest assigned row of any duplicated assignment (id breaks
+    # ties) before enforcing uniqueness
+    conn.execute(text(
+        "DELETE FROM exam_assignments WHERE id IN ("
+        "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+        "PARTITION BY exam_id, candidate_email ORDER BY assigned_at, id) AS rn "
+        "FROM exam_assignments) ranked WHERE rn > 1)"
+    ))
+    _create_index(
+        conn, "uq_exam_assignments_exam_candidate", "exam_assignments",
+        "exam_id, candidate_email", unique=True
+    )
+
+
+def m0003_hot_path_indexes(conn):
+    _create_index(conn, "ix_exam_assignments_candidate_email", "exam_assignments", "candidate_email")
+    _create_index(conn, "ix_candidate_exams_user_status", "candidate_exams", "user_id, status")
+    _create_index(
+        conn, "ix_candidate_exams_in_progress", "candidate_exams", "user_id",
+        where="status = 'in_progress'"
+    )
+    _create_index(conn, "ix_candidate_exams_exam_id", "candidate_exams", "exam_id")
+    _create_index(conn, "ix_questions_exam_id", "questions", "exam_id")
+
+
+def m0004_results_keyset_index(conn):
+    _create_index(conn, "ix_candidate_exams_started_at_id", "candidate_exams", "started_at, id")
+
+
+def m0005_candidate_answers(conn):
+    CANDIDATE_ANSWERS.create(bind=conn, checkfirst=True)
+
+
+def m0006_candidate_exam_deadlines(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("candidate_exams")}
+    if "deadline_at" not in columns:
+        conn.execute(text("ALTER TABLE candidate_exams ADD COLUMN deadline_at TIMESTAMP"))
+
+    # Open attempts get the deadline their timer implied, so the sweeper closes abandoned ones
+    if conn.dialect.name == "postgresql":
+        deadline = "(started_at AT TIME ZONE 'UTC') + make_interval(secs => COALESCE(time_allowed_secs, 1800))"
+    else:
+        deadline = "datetime(started_at, '+' || COALESCE(time_allowed_secs, 1800) || ' seconds')"
+    conn.execute(text(
+        f"UPDATE candidate_exams SET deadline_at = {deadline} "
+        "WHERE status = 'in_progress' AND deadline_at IS NULL AND started_at IS NOT NULL"
+    ))
+    _create_index(
+        conn, "ix_candidate_exams_open_deadline", "candidate_exams", "deadline_at",
+        where="status = 'in_progress'"
+    )
+
+
+def m0007_item_stats(conn):
+    ITEM_STATS.create(bind=conn, checkfirst=True)
+    ITEM_CHOICE_COUNTS.create(bind=conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    ("0001", "baseline", m0001_baseline),
+    ("0002", "question_bank_and_unique_assignments", m0002_question_bank_and_unique_assignments),
+    ("0003", "hot_path_indexes", m0003_hot_path_indexes),
+    ("0004", "results_keyset_index", m0004_results_keyset_index),
+    ("0005", "candidate_answers", m0005_candidate_answers),
+    ("0006", "candidate_exam_deadlines", m0006_candidate_exam_deadlines),
+    ("0007", "item_stats", m0007_item_stats),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def applied_versions(bind=engine) -> set:
+    with bind.begin() as conn:
+        _ensure_version_table(conn)
+        return {v for (v,) in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def upgrade(bind=engine) -> list:
+    """Apply pending migrations in order; returns the versions applied."""
+    done = applied_versions(bind)
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        with bind.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()}
+            )
+        applied.append(version)
+    return applied
+
+
+# EXPLAIN CHECK
+
+# Representative WHERE clauses of the hot endpoints and the index each should use
+HOT_QUERIES = [
+    ("start_exam assignment lookup",
+     "SELECT id FROM exam_assignments WHERE exam_id = :exam_id AND candidate_email = :email"),
+    ("list_available_exams",
+     "SELECT exam_id FROM exam_assignments WHERE candidate_email = :email"),
+    ("resume_exam / start_exam in-progress attempt",
+     "SELECT id FROM candidate_exams WHERE user_id = :user_id AND status = 'in_progress'"),
+    ("attempts of an exam",
+     "SELECT id FROM candidate_exams WHERE exam_id = :exam_id"),
+    ("expiry sweeper",
+     "SELECT id FROM candidate_exams WHERE status = 'in_progress' AND deadline_at < :now "
+     "ORDER BY deadline_at"),
+    ("legacy exam questions",
+     "SELECT id FROM questions WHERE exam_id = :exam_id"),
+]
+SAMPLE_PARAMS = {"exam_id": "x", "email": "x@example.com", "user_id": "x", "now": datetime(2000, 1, 1)}
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain_hot_queries(bind=engine) -> list:
+    """Return (label, uses_index, plan summary) for each hot query."""
+    results = []
+    with bind.connect() as conn:
+        dialect = conn.dialect.name
+        for label, sql in HOT_QUERIES:
+            if dialect == "postgresql":
+                (plan,) = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), SAMPLE_PARAMS).one()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = [n["Node Type"] for n in _plan_nodes(plan[0]["Plan"])]
+                uses_index = any("Index" in n for n in nodes) and "Seq Scan" not in nodes
+                summary = " > ".join(nodes)
+            else:
+                rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), SAMPLE_PARAMS).all()
+                details = [row[-1] for row in rows]
+                uses_index = all("USING" in d and "INDEX" in d for d in details)
+                summary = "; ".join(details)
+            results.append((label, uses_index, summary))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("command", choices=["upgrade", "status", "explain"])
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = upgrade()
+        print(f"Applied: {', '.join(applied)}" if applied else "Schema is up to date")
+
+    elif args.command == "status":
+        done = applied_versions()
+        for version, name, _ in MIGRATIONS:
+            print(f"{'[x]' if version in done else '[ ]'} {version} {name}")
+
+    else:
+        # Run against a database seeded at production scale (see
+        # benchmarks/explain_hot_queries.py); on tiny tables Postgres
+        # legitimately prefers sequential scans.
+        ok = True
+        for label, uses_index, summary in explain_hot_queries():
+            ok = ok and uses_index
+            print(f"{'OK  ' if uses_index else 'SCAN'} {label}: {summary}")
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
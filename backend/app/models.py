@@ -1,7 +1,7 @@
 # backend/app/models.py
 import enum
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Enum, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Boolean, Enum, JSON, ForeignKey, UniqueConstraint, Index, text
 from sqlalchemy.sql import func
 from .db import Base
 
@@ -28,7 +28,8 @@ class Question(Base):
     text = Column(String, nullable=False)
     choices = Column(JSON, nullable=False)  # list of choices
     answer_index = Column(Integer, nullable=False)  # index in choices (0-based)
-    exam_id = Column(String, ForeignKey('exams.id'), nullable=True)  # Link to exam
+    exam_id = Column(String, ForeignKey('exams.id'), nullable=True, index=True)  # Legacy direct link, see ExamQuestion
+    language = Column(String, nullable=True, index=True)  # question bank key (lowercased)
 
 class Exam(Base):
     __tablename__ = "exams"
@@ -41,20 +42,61 @@ class Exam(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True)
 
+class ExamQuestion(Base):
+    __tablename__ = "exam_questions"
+    exam_id = Column(String, ForeignKey('exams.id'), primary_key=True)
+    question_id = Column(String, ForeignKey('questions.id'), primary_key=True)
+    position = Column(Integer, nullable=False)  # order within the exam
+
+class ExamJob(Base):
+    __tablename__ = "exam_jobs"
+    id = Column(String, primary_key=True, default=gen_id)
+    title = Column(String, nullable=False)
+    language = Column(String, nullable=False)
+    question_count = Column(Integer, nullable=False)
+    time_allowed_secs = Column(Integer, nullable=False)
+    created_by = Column(String, ForeignKey('users.id'), nullable=False)
+    status = Column(String, default="pending")  # pending/running/completed/failed
+    questions_collected = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    errors = Column(JSON, nullable=True)  # list of error messages
+    exam_id = Column(String, ForeignKey('exams.id'), nullable=True)  # set once completed
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
 class ExamAssignment(Base):
     __tablename__ = "exam_assignments"
+    __table_args__ = (
+        UniqueConstraint('exam_id', 'candidate_email', name='uq_exam_assignments_exam_candidate'),
+    )
     id = Column(String, primary_key=True, default=gen_id)
     exam_id = Column(String, ForeignKey('exams.id'), nullable=False)
-    candidate_email = Column(String, nullable=False)  # Email of the candidate
+    candidate_email = Column(String, nullable=False, index=True)  # Email of the candidate
     assigned_by = Column(String, ForeignKey('users.id'), nullable=False)  # Admin who assigned
     assigned_at = Column(DateTime(timezone=True), server_default=func.now())
     status = Column(String, default="assigned")  # assigned/started/completed
 
 class CandidateExam(Base):
     __tablename__ = "candidate_exams"
+    __table_args__ = (
+        Index('ix_candidate_exams_user_status', 'user_id', 'status'),
+        Index('ix_candidate_exams_started_at_id', 'started_at', 'id'),  # results keyset
+        # Only a small share of attempts are open at any time
+        Index(
+            'ix_candidate_exams_in_progress', 'user_id',
+            postgresql_where=text("status = 'in_progress'"),
+            sqlite_where=text("status = 'in_progress'")
+        ),
+        # Expiry sweeper: open attempts in deadline order
+        Index(
+            'ix_candidate_exams_open_deadline', 'deadline_at',
+            postgresql_where=text("status = 'in_progress'"),
+            sqlite_where=text("status = 'in_progress'")
+        ),
+    )
     id = Column(String, primary_key=True, default=gen_id)
     user_id = Column(String, nullable=False)
-    exam_id = Column(String, ForeignKey('exams.id'), nullable=False)  # Link to exam template
+    exam_id = Column(String, ForeignKey('exams.id'), nullable=False, index=True)  # Link to exam template
     question_ids = Column(JSON, nullable=True)  # ordered list of question ids
     answers = Column(JSON, nullable=True)  # mapping question_id -> selected index
     started_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -62,5 +104,45 @@ class CandidateExam(Base):
     status = Column(String, default="not_started")  # in_progress/completed/timed_out
     time_allowed_secs = Column(Integer, default=1800)
     time_elapsed = Column(Integer, default=0)  # seconds
+    deadline_at = Column(DateTime, nullable=True)  # UTC; set by the server on start
 
     score = Column(Integer, default=0)
+
+class CandidateAnswer(Base):
+    __tablename__ = "candidate_answers"
+    candidate_exam_id = Column(String, ForeignKey('candidate_exams.id'), primary_key=True)
+    question_id = Column(String, primary_key=True)
+    selected_index = Column(Integer, nullable=False)
+    answered_at = Column(DateTime, nullable=False)
+
+class ItemStat(Base):
+    # Running item-analysis counters, one row per question of an exam
+    __tablename__ = "item_stats"
+    exam_id = Column(String, ForeignKey('exams.id'), primary_key=True)
+    question_id = Column(String, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)  # graded attempts containing the question
+    correct = Column(Integer, nullable=False, default=0)
+    # Sums over those attempts of their raw score (questions correct), for point-biserial
+    score_sum = Column(BigInteger, nullable=False, default=0)
+    score_sq_sum = Column(BigInteger, nullable=False, default=0)
+    correct_score_sum = Column(BigInteger, nullable=False, default=0)
+
+class ItemChoiceCount(Base):
+    __tablename__ = "item_choice_counts"
+    exam_id = Column(String, ForeignKey('exams.id'), primary_key=True)
+    question_id = Column(String, primary_key=True)
+    choice_index = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(String, primary_key=True, default=gen_id)
+    to_email = Column(String, nullable=False)
+    template = Column(String, nullable=False)  # e.g. exam_assignment
+    context = Column(JSON, nullable=False)  # template arguments
+    status = Column(String, default="pending")  # pending/sent/failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=False)  # also the claim lease while sending
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
@@ -0,0 +1,168 @@
+# backend/app/outbox.py
+"""Transactional email outbox and its background SMTP sender.
+
+Rows are added in the same commit as the change that triggers them and sent
+later by sender threads, each reusing one authenticated SMTP connection.
+Run standalone with ``python -m backend.app.outbox``.
+"""
+import os
+import time
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy.orm import Session
+from .db import SessionLocal
+from . import models, email_utils
+
+OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECS = float(os.getenv("EMAIL_OUTBOX_POLL_SECS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_SECS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_SECS", "30"))  # doubled per attempt
+OUTBOX_LEASE_SECS = 300
+MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+TEMPLATES = {
+    "exam_assignment": email_utils.build_exam_assignment_email,
+}
+
+
+def enqueue_email(db: Session, to_email: str, template: str, **context) -> models.EmailOutbox:
+    """Add an outbox row to the session; it is sent once the caller commits."""
+    row = models.EmailOutbox(
+        to_email=to_email,
+        template=template,
+        context=context,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(row)
+    return row
+
+
+def claim_batch(db: Session, limit: int) -> List[models.EmailOutbox]:
+    """Lease up to ``limit`` due rows so no other sender picks them up."""
+    now = datetime.utcnow()
+    rows = db.query(models.EmailOutbox).filter(
+        models.EmailOutbox.status == "pending",
+        models.EmailOutbox.next_attempt_at <= now
+    ).order_by(
+        models.EmailOutbox.next_attempt_at
+    ).limit(limit).with_for_update(skip_locked=True).all()
+
+    # A sender that dies mid-batch leaves rows that become due again after the lease
+    for row in rows:
+        row.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE_SECS)
+    db.commit()
+    return rows
+
+
+def _mark_failed_attempt(row: models.EmailOutbox, error: Exception):
+    row.attempts = (row.attempts or 0) + 1
+    row.last_error = str(error)[:500]
+    if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+        row.status = "failed"
+    else:
+        delay = OUTBOX_BACKOFF_SECS * (2 ** (row.attempts - 1))
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+
+class _Connection:
+    """One SMTP session, opened lazily and recycled after a message budget."""
+
+    def __init__(self):
+        self.server = None
+        self.sent = 0
+
+    def send(self, msg):
+        if self.server is None or self.sent >= MAX_MESSAGES_PER_CONNECTION:
+            self.close()
+            self.server = email_utils.open_smtp_connection()
+        try:
+            self.server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Stale keep-alive connection: reconnect once and retry
+            self.close()
+            self.server = email_utils.open_smtp_connection()
+            self.server.send_message(msg)
+        self.sent += 1
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+        self.server = None
+        self.sent = 0
+
+
+def send_pending(conn: _Connection, limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Claim and send one batch; returns the number of rows processed."""
+    # Claimed rows stay loaded across the per-message commits (no reload per row)
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        rows = claim_batch(db, limit)
+        for row in rows:
+            try:
+                build = TEMPLATES[row.template]
+                conn.send(build(row.to_email, **row.context))
+                row.status = "sent"
+                row.attempts = (row.attempts or 0) + 1
+                row.sent_at = datetime.utcnow()
+            except Exception as e:
+                print(f"❌ Email failed for {row.to_email}: {e}")
+                _mark_failed_attempt(row, e)
+            # Commit per message so a crash never re-sends what went out
+            db.commit()
+        return len(rows)
+    finally:
+        db.close()
+
+
+class OutboxSender:
+    def __init__(self, workers: int = OUTBOX_WORKERS):
+        self.workers = workers
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        conn = _Connection()
+        try:
+            while not self._stop.is_set():
+                try:
+                    processed = send_pending(conn)
+                except Exception as e:
+                    print(f"❌ Outbox sender error: {e}")
+                    processed = 0
+
+                if not processed:
+                    # Idle: don't keep the SMTP session open until the server drops it
+                    conn.close()
+                    self._stop.wait(OUTBOX_POLL_SECS)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    sender = OutboxSender()
+    sender.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        sender.stop()
@@ -0,0 +1,38 @@
+# backend/app/pagination.py
+import json
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import String, literal, tuple_
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    """Opaque keyset cursor for rows ordered by (timestamp, id) descending."""
+    raw = json.dumps([sort_value.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor: (sort_value, row_id)."""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(sort_value), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _sqlite_timestamp(value: datetime) -> str:
+    # CURRENT_TIMESTAMP (server_default) stores no fraction, values bound by
+    # SQLAlchemy always have six digits; match the row the cursor came from
+    text = value.strftime("%Y-%m-%d %H:%M:%S")
+    return f"{text}.{value.microsecond:06d}" if value.microsecond else text
+
+
+def before_cursor(db: Session, sort_column, id_column, cursor: str):
+    """Filter for the rows after ``cursor`` in (sort_column, id) descending order."""
+    sort_value, row_id = decode_cursor(cursor)
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite compares timestamps as text, so bind in the stored format
+        sort_value = literal(_sqlite_timestamp(sort_value), String)
+    return tuple_(sort_column, id_column) < tuple_(sort_value, row_id)
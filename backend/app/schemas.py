@@ -1,6 +1,6 @@
 # backend/app/schemas.py
-from pydantic import BaseModel, EmailStr
-from typing import List, Dict, Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Dict, Optional, Union
 from datetime import datetime
 
 class RegisterIn(BaseModel):
@@ -8,10 +8,19 @@ class RegisterIn(BaseModel):
     password: str
     name: Optional[str] = None
 
+class RegisterOut(BaseModel):
+    msg: str
+    email: str
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
 
+class UserOut(BaseModel):
+    email: str
+    name: Optional[str] = None
+    is_admin: bool
+
 class LoginIn(BaseModel):
     email: EmailStr
     password: str
@@ -40,39 +49,174 @@ class ExamOut(BaseModel):
     language: str
     question_count: int
     time_allowed_secs: int
-    created_at: datetime
+    created_at: Optional[datetime] = None
     is_active: bool
 
+class ExamToggleOut(BaseModel):
+    msg: str
+    is_active: bool
+
+class ExamJobOut(BaseModel):
+    id: str
+    title: str
+    language: str
+    question_count: int
+    status: str
+    questions_collected: int
+    attempts: int
+    errors: Optional[List[str]] = None
+    exam_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class ExamAssignIn(BaseModel):
     candidate_emails: List[EmailStr]
 
+class ExamAssignOut(BaseModel):
+    new_users_created: int
+    new_assignments: int
+    emails_queued: int
+
+# LLM replies can carry numeric options; older rows store them as such
+Choice = Union[str, int, float]
+
+class CandidateQuestionOut(BaseModel):
+    # What a candidate sees of a question: no answer index
+    id: str
+    text: str
+    choices: List[Choice]
+
 class ExamDetailOut(BaseModel):
     id: str
-    questions: List[QuestionOut]
+    questions: Optional[List[CandidateQuestionOut]] = None  # None with include_questions=false
     time_allowed_secs: int
     time_elapsed: int
+    deadline_at: Optional[datetime] = None
     status: str
 
 class CandidateExamCreateOut(BaseModel):
     id: str
     question_ids: List[str]
     time_allowed_secs: int
+    deadline_at: Optional[datetime] = None
 
 class AnswerIn(BaseModel):
     question_id: str
-    selected_index: int
+    selected_index: int = Field(ge=0)
     time_elapsed: int  # seconds elapsed so far on client (to help server)
 
-class ResumeQuestionOut(BaseModel):
-    id: str
-    text: str
-    choices: list
+class AnswerItem(BaseModel):
+    question_id: str
+    selected_index: int = Field(ge=0)
+
+class AnswersBatchIn(BaseModel):
+    answers: List[AnswerItem]
+    time_elapsed: int
 
+class AnswerSavedOut(BaseModel):
+    msg: str
+
+class AnswersSavedOut(BaseModel):
+    msg: str
+    saved: int
 
 class ResumeExamOut(BaseModel):
     candidate_exam_id: str
-    questions: list[ResumeQuestionOut]
-    answers: dict
+    exam_id: str
+    questions: Optional[List[CandidateQuestionOut]] = None  # None with include_questions=false
+    answers: Dict[str, int]
     time_allowed_secs: int
     time_elapsed: int
+    deadline_at: Optional[datetime] = None
     status: str
+
+class SubmitOut(BaseModel):
+    msg: str
+    score: Optional[int] = None
+    status: str
+
+class ResultDetailOut(BaseModel):
+    question: str
+    choices: List[Choice]
+    selected: Optional[int] = None
+    correct_index: Optional[int] = None
+    is_correct: bool
+
+class ResultOut(BaseModel):
+    score: Optional[int] = None
+    status: str
+    details: List[ResultDetailOut]
+
+
+class CandidateResultOut(BaseModel):
+    candidate_exam_id: str
+    candidate_email: str
+    candidate_name: Optional[str] = None
+    exam_id: str
+    exam_title: str
+    exam_language: str
+    status: str
+    score: Optional[int] = None
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    time_elapsed: Optional[int] = None
+
+class CandidateResultsSummary(BaseModel):
+    total: int
+    completed: int
+    in_progress: int
+    timed_out: int
+    avg_score: Optional[float] = None
+
+class CandidateResultsPage(BaseModel):
+    items: List[CandidateResultOut]
+    next_cursor: Optional[str] = None
+    summary: Optional[CandidateResultsSummary] = None  # first page only
+
+class ExamAssignmentOut(BaseModel):
+    candidate_email: str
+    assigned_at: Optional[datetime] = None
+    status: str
+    score: Optional[int] = None
+
+class ExamAssignmentsPage(BaseModel):
+    items: List[ExamAssignmentOut]
+    next_cursor: Optional[str] = None
+
+class ItemStatOut(BaseModel):
+    question_id: str
+    position: int
+    text: str
+    answer_index: int
+    attempts: int
+    correct: int
+    p_value: Optional[float] = None  # share of attempts answering correctly
+    point_biserial: Optional[float] = None
+    choice_counts: List[int]  # picks per choice index
+    omitted: int
+
+class ExamSummaryOut(BaseModel):
+    exam_id: str
+    title: str
+    language: str
+    is_active: bool
+    assigned: int
+    started: int
+    in_progress: int
+    completed: int
+    timed_out: int
+    avg_score: Optional[float] = None
+    median_score: Optional[float] = None
+
+class HashingMetricsOut(BaseModel):
+    completed: int
+    rejected: int
+    in_flight: int
+    pool_size: int
+    queue_limit: int
+    queue_wait_secs_total: float
+    queue_wait_secs_max: float
+    queue_wait_secs_avg: float
+    hash_secs_total: float
+    hash_secs_max: float
+    hash_secs_avg: float
@@ -0,0 +1,65 @@
+# backend/app/serialization.py
+"""Response encoding: orjson by default, MessagePack when the client asks.
+
+Every endpoint declares a response model, so FastAPI serializes through
+pydantic and hands the response class plain JSON-ready data (no
+jsonable_encoder pass). Clients sending ``Accept: application/x-msgpack``
+get the same data as MessagePack when the msgpack package is installed.
+"""
+from contextvars import ContextVar
+import orjson
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:  # optional; without it everyone gets JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+_accepts_msgpack = ContextVar("accepts_msgpack", default=False)
+
+
+def _msgpack_default(value):
+    # Only reached for values pydantic didn't already turn into JSON types
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class NegotiatedResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        if msgpack is not None and _accepts_msgpack.get():
+            # Response.__init__ renders before building headers, so this sets Content-Type
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return msgpack.packb(content, default=_msgpack_default)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ContentNegotiationMiddleware:
+    """Records per request whether the client accepts MessagePack.
+
+    Plain ASGI (not BaseHTTPMiddleware) so the endpoint runs in the same
+    context and NegotiatedResponse can read the flag.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or msgpack is None:
+            await self.app(scope, receive, send)
+            return
+
+        accept = next((value for name, value in scope["headers"] if name == b"accept"), b"")
+        token = _accepts_msgpack.set(MSGPACK_MEDIA_TYPE.encode() in accept)
+
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"vary", b"Accept")]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _accepts_msgpack.reset(token)
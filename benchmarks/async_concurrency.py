@@ -0,0 +1,179 @@
+# benchmarks/async_concurrency.py
+"""Throughput of save-answer, get and resume: sync (threadpool) vs async handlers.
+
+    python benchmarks/async_concurrency.py [--concurrency 50] [--requests 20]
+
+"sync" rows hit copies of the endpoints as they were before they moved to
+AsyncSession: plain def handlers on the sync engine, run in Starlette's
+threadpool (40 threads by default). "async" rows hit the real endpoints.
+Each of --concurrency virtual candidates owns an attempt and sends
+--requests requests back to back; all candidates run at once through an
+in-process ASGI transport, so the client shares the event loop with the
+server. On SQLite writes serialize on the file lock, which caps
+save-answer either way; use BENCH_DATABASE_URL with Postgres for real
+numbers.
+"""
+import time
+import asyncio
+import argparse
+import common
+import httpx
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from backend.app import auth, exam, models, schemas, content_cache
+from backend.app.db import SessionLocal
+from backend.app.main import app
+
+sync_router = APIRouter(prefix="/sync")
+
+
+def _own_attempt(db: Session, candidate_exam_id: str, user_id: str) -> models.CandidateExam:
+    candidate_exam = db.query(models.CandidateExam).filter(
+        models.CandidateExam.id == candidate_exam_id,
+        models.CandidateExam.user_id == user_id
+    ).first()
+    if not candidate_exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    return candidate_exam
+
+
+@sync_router.post("/exam/{candidate_exam_id}/save-answer", response_model=schemas.AnswerSavedOut)
+def save_answer(
+    candidate_exam_id: str,
+    payload: schemas.AnswerIn,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_db)
+):
+    answers = {payload.question_id: payload.selected_index}
+    if not exam.record_answers(db, candidate_exam_id, current_user.id, answers, payload.time_elapsed):
+        raise HTTPException(status_code=409, detail="Exam is closed or its time is up")
+    db.commit()
+    return {"msg": "answer_saved"}
+
+
+@sync_router.get("/exam/resume", response_model=schemas.ResumeExamOut)
+def resume_exam(
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_db)
+):
+    candidate_exam = db.query(models.CandidateExam).filter(
+        models.CandidateExam.user_id == current_user.id,
+        models.CandidateExam.status == "in_progress"
+    ).first()
+    if not candidate_exam:
+        raise HTTPException(status_code=404, detail="No active exam")
+
+    content = content_cache.get_content(db, candidate_exam.exam_id, candidate_exam.question_ids)
+    return {
+        "candidate_exam_id": candidate_exam.id,
+        "exam_id": candidate_exam.exam_id,
+        "questions": content.questions,
+        "answers": exam.current_answers(db, candidate_exam),
+        "time_allowed_secs": candidate_exam.time_allowed_secs,
+        "time_elapsed": exam.current_time_elapsed(candidate_exam),
+        "deadline_at": candidate_exam.deadline_at,
+        "status": candidate_exam.status
+    }
+
+
+@sync_router.get("/exam/{candidate_exam_id}", response_model=schemas.ExamDetailOut)
+def get_exam(
+    candidate_exam_id: str,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_db)
+):
+    candidate_exam = _own_attempt(db, candidate_exam_id, current_user.id)
+    content = content_cache.get_content(db, candidate_exam.exam_id, candidate_exam.question_ids)
+    return {
+        "id": candidate_exam.id,
+        "questions": content.questions,
+        "time_allowed_secs": candidate_exam.time_allowed_secs,
+        "time_elapsed": exam.current_time_elapsed(candidate_exam),
+        "deadline_at": candidate_exam.deadline_at,
+        "status": candidate_exam.status
+    }
+
+
+async def seed(client: httpx.AsyncClient, candidates: int, question_count: int) -> list:
+    """One started attempt per candidate: [(headers, candidate_exam_id, question_ids)]."""
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        admin = common.make_user(db, is_admin=True)
+        exam_obj = common.make_exam(db, admin, question_count)
+        question_ids = exam.exam_question_ids(db, exam_obj.id)
+        users = []
+        for _ in range(candidates):
+            candidate = common.make_user(db)
+            common.assign(db, exam_obj, admin, candidate)
+            users.append(candidate)
+    finally:
+        db.close()
+
+    attempts = []
+    for candidate in users:
+        headers = common.auth_headers(candidate)
+        ce_id = (await client.post(f"/exam/{exam_obj.id}/start", headers=headers)).json()["id"]
+        attempts.append((headers, ce_id, question_ids))
+    return attempts
+
+
+def request_for(endpoint: str, prefix: str):
+    def send(client: httpx.AsyncClient, headers: dict, ce_id: str, question_ids: list, i: int):
+        if endpoint == "save-answer":
+            return client.post(f"{prefix}/exam/{ce_id}/save-answer", headers=headers, json={
+                "question_id": question_ids[i % len(question_ids)], "selected_index": i % 4, "time_elapsed": 5
+            })
+        if endpoint == "get":
+            return client.get(f"{prefix}/exam/{ce_id}", headers=headers)
+        return client.get(f"{prefix}/exam/resume", headers=headers)
+    return send
+
+
+async def run(client: httpx.AsyncClient, attempts: list, send, requests_each: int):
+    """(samples, wall seconds, errors) with every candidate sending at once."""
+    samples, errors = [], 0
+
+    async def candidate(headers, ce_id, question_ids):
+        nonlocal errors
+        for i in range(requests_each):
+            started = time.perf_counter()
+            response = await send(client, headers, ce_id, question_ids, i)
+            samples.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(candidate(*attempt) for attempt in attempts))
+    return samples, time.perf_counter() - started, errors
+
+
+async def bench(args):
+    # One event loop for everything: the async engine's pool is bound to it
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        attempts = await seed(client, args.concurrency, args.questions)
+        for endpoint in ("save-answer", "get", "resume"):
+            for label, prefix in (("sync", "/sync"), ("async", "")):
+                send = request_for(endpoint, prefix)
+                await run(client, attempts, send, 2)  # warm up pools and caches
+                samples, wall, errors = await run(client, attempts, send, args.requests)
+                common.report(
+                    f"{endpoint} ({label}, c={args.concurrency})", samples,
+                    f"req/s={len(samples) / wall:8.1f}  errors={errors}"
+                )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="requests per candidate")
+    parser.add_argument("--questions", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    common.setup_database()
+    app.include_router(sync_router)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/auth_cache.py
+"""/me and save-answer with and without the verified-token and user caches.
+
+    python benchmarks/auth_cache.py [--iterations 500]
+
+"Uncached" sets both caches to size 0, the same as running with
+AUTH_TOKEN_CACHE_SIZE=0 and AUTH_USER_CACHE_SIZE=0: every request decodes the
+JWT and looks the user up. Also reports DB statements per request.
+"""
+import argparse
+import common
+from fastapi.testclient import TestClient
+from backend.app import auth, exam
+from backend.app.db import SessionLocal
+from backend.app.main import app
+
+
+def set_caches(enabled: bool):
+    for cache, size in ((auth.token_cache, auth.TOKEN_CACHE_SIZE), (auth.user_cache, auth.USER_CACHE_SIZE)):
+        cache.maxsize = size if enabled else 0
+        cache._data.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    common.setup_database()
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        admin = common.make_user(db, is_admin=True)
+        candidate = common.make_user(db)
+        exam_obj = common.make_exam(db, admin, 20)
+        common.assign(db, exam_obj, admin, candidate)
+        question_ids = exam.exam_question_ids(db, exam_obj.id)
+    finally:
+        db.close()
+
+    headers = common.auth_headers(candidate)
+    client = TestClient(app)
+    ce_id = client.post(f"/exam/{exam_obj.id}/start", headers=headers).json()["id"]
+
+    def me():
+        assert client.get("/me", headers=headers).status_code == 200
+
+    def save_answer():
+        response = client.post(f"/exam/{ce_id}/save-answer", headers=headers, json={
+            "question_id": question_ids[0], "selected_index": 1, "time_elapsed": 5
+        })
+        assert response.status_code == 200
+
+    for enabled in (False, True):
+        label = "cached" if enabled else "uncached"
+        for name, fn in (("/me", me), ("save-answer", save_answer)):
+            set_caches(enabled)
+            samples = common.measure(fn, args.iterations)
+            with common.StatementCounter() as counter:
+                fn()
+            common.report(f"{name} ({label})", samples, f"statements/request={counter.count}")
+
+
+if __name__ == "__main__":
+    main()
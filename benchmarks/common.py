@@ -0,0 +1,93 @@
+# benchmarks/common.py
+"""Shared setup for the benchmark scripts.
+
+Import this before anything from backend.app. Benchmarks run against
+BENCH_DATABASE_URL (default: a throwaway SQLite file), never DATABASE_URL,
+so they can't write to a real database by accident. SQLite numbers are
+only indicative; point BENCH_DATABASE_URL at a scratch Postgres database
+for figures that mean something in production.
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp(prefix="nmk-bench-")
+
+BENCH_ENV = {
+    "DATABASE_URL": os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{TMP}/bench.db",
+    "EMAIL_OUTBOX_ENABLED": "0",
+    "EXAM_EXPIRY_ENABLED": "0",
+    "ANSWER_WRITE_BEHIND": "0",
+    "ANSWER_JOURNAL_PATH": os.path.join(TMP, "answer_journal.jsonl"),
+    "HASH_POOL_SIZE": "0",
+}
+os.environ.update(BENCH_ENV)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("DATABASE_READ_REPLICA_URL", None)
+
+FACTORIES = ("make_user", "auth_headers", "make_exam", "assign")
+
+
+def __getattr__(name):
+    # Row factories are the test suite's (tests/factories.py), loaded on first
+    # use so that importing this module doesn't import backend.app early
+    if name in FACTORIES:
+        from tests import factories
+        return getattr(factories, name)
+    raise AttributeError(name)
+
+
+def setup_database():
+    from backend.app import migrations
+    migrations.upgrade()
+
+
+class StatementCounter:
+    """Counts statements sent on the sync and async engines while attached."""
+
+    def __init__(self):
+        from backend.app.db import engine
+        from backend.app.async_db import async_engine
+        self.engines = [engine, async_engine.sync_engine]
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        for e in self.engines:
+            event.listen(e, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        for e in self.engines:
+            event.remove(e, "before_cursor_execute", self._on_execute)
+
+
+def measure(fn, iterations: int, warmup: int = 5) -> list:
+    """Per-call wall times in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(name: str, samples: list, extra: str = ""):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{name:<40} n={len(samples):<6} mean={statistics.mean(samples) * 1000:8.3f} ms  "
+        f"p50={statistics.median(samples) * 1000:8.3f} ms  p95={p95 * 1000:8.3f} ms  {extra}"
+    )
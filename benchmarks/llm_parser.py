@@ -0,0 +1,113 @@
+# benchmarks/llm_parser.py
+"""LLM response parsing: the old flat-object regex vs QuestionStreamParser.
+
+    python benchmarks/llm_parser.py [--questions 5000] [--iterations 10]
+
+Three payloads: "large" (well-formed, a share of questions with braces in
+their text), "malformed" (every tenth object broken) and "truncated" (the
+large body cut off mid-object). "whole" parses the complete body at once;
+"chunked" feeds it in STREAM_CHUNK_SIZE pieces as fetch_batch does. The old
+parser cannot stream, so its chunked row re-parses the received prefix on
+every chunk, which is what streaming with it would take. "found" is the
+number of questions recovered.
+"""
+import re
+import json
+import random
+import argparse
+import common
+from backend.app import llm
+
+
+def old_parse(raw_text: str):
+    """parse_llm_response as it was before QuestionStreamParser."""
+    if not raw_text:
+        return []
+
+    text = re.sub(r"```json|```", "", raw_text, flags=re.IGNORECASE).strip()
+    start = text.find("[")
+    if start == -1:
+        return []
+    text = text[start:]
+
+    questions = []
+    for block in re.findall(r"\{[^{}]*\}", text, re.DOTALL):
+        try:
+            item = json.loads(block)
+        except Exception:
+            continue
+
+        q = item.get("Question")
+        opts = item.get("Options")
+        ans = item.get("Answer")
+        if not q or not opts or not ans:
+            continue
+
+        answer_index = None
+        for i, opt in enumerate(opts):
+            if str(opt).strip() == str(ans).strip():
+                answer_index = i
+                break
+        if answer_index is None:
+            continue
+
+        questions.append({"question": q, "options": opts, "answer_index": answer_index})
+    return questions
+
+
+def payloads(count: int) -> dict:
+    rng = random.Random(11)
+    objects = []
+    for i in range(count):
+        text = f"Question {i}: what does this print?"
+        if i % 5 == 0:
+            text += ' print({"a": 1}["a"])'  # braces and escaped quotes in the text
+        options = [f"option {i}-{k}" for k in range(4)]
+        objects.append(json.dumps({"Question": text, "Options": options, "Answer": options[rng.randrange(4)]}))
+
+    large = "```json\n[" + ",\n".join(objects) + "]\n```"
+    broken = [o[:-1] + ',}' if i % 10 == 0 else o for i, o in enumerate(objects)]  # trailing comma
+    malformed = "```json\n[" + ",\n".join(broken) + "]\n```"
+    cut = large.rfind('{"Question"', 0, len(large) // 2)
+    truncated = large[:cut + 40]
+    return {"large": large, "malformed": malformed, "truncated": truncated}
+
+
+def new_whole(body: str):
+    return llm.QuestionStreamParser().feed(body)
+
+
+def new_chunked(body: str):
+    parser = llm.QuestionStreamParser()
+    out = []
+    for i in range(0, len(body), llm.STREAM_CHUNK_SIZE):
+        out += parser.feed(body[i:i + llm.STREAM_CHUNK_SIZE])
+    return out
+
+
+def old_chunked(body: str):
+    out = []
+    for i in range(llm.STREAM_CHUNK_SIZE, len(body) + llm.STREAM_CHUNK_SIZE, llm.STREAM_CHUNK_SIZE):
+        out = old_parse(body[:i])
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    for name, body in payloads(args.questions).items():
+        for label, fn, iterations in (
+            ("old regex, whole", old_parse, args.iterations),
+            ("stream parser, whole", new_whole, args.iterations),
+            ("old regex, chunked", old_chunked, 1),
+            ("stream parser, chunked", new_chunked, args.iterations),
+        ):
+            samples = common.measure(lambda: fn(body), iterations, warmup=1)
+            common.report(f"{name}: {label}", samples, f"found={len(fn(body))}  bytes={len(body)}")
+
+
+if __name__ == "__main__":
+    main()
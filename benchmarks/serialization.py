@@ -0,0 +1,117 @@
+# benchmarks/serialization.py
+"""Encoding a 10k-row results page: jsonable_encoder vs orjson vs MessagePack.
+
+    python benchmarks/serialization.py [--rows 10000] [--iterations 20]
+
+"encode" rows time only turning the endpoint's return value into bytes.
+"endpoint" rows go through FastAPI on a scratch app: the old style (no
+response model, default JSONResponse, so jsonable_encoder + json.dumps)
+against the current style (typed response model, NegotiatedResponse with
+orjson, or msgpack when the client sends Accept: application/x-msgpack).
+"""
+import json
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta
+import common
+import orjson
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from backend.app import schemas, serialization
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def results_page(rows: int) -> dict:
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    items = []
+    for i in range(rows):
+        started = now - timedelta(minutes=rng.randint(0, 100000))
+        items.append({
+            "candidate_exam_id": str(uuid.uuid4()),
+            "candidate_email": f"candidate{i}@example.com",
+            "candidate_name": f"Candidate {i}",
+            "exam_id": str(uuid.uuid4()),
+            "exam_title": "Python fundamentals",
+            "exam_language": "python",
+            "status": "completed",
+            "score": rng.randint(0, 100),
+            "started_at": started,
+            "ended_at": started + timedelta(minutes=25),
+            "time_elapsed": 1500
+        })
+    return {
+        "items": items,
+        "next_cursor": None,
+        "summary": {"total": rows, "completed": rows, "in_progress": 0, "timed_out": 0, "avg_score": 50.0}
+    }
+
+
+def scratch_app(payload: dict) -> FastAPI:
+    app = FastAPI(default_response_class=serialization.NegotiatedResponse)
+    app.add_middleware(serialization.ContentNegotiationMiddleware)
+
+    @app.get("/old", response_class=JSONResponse)
+    def old_style():
+        return payload
+
+    @app.get("/new", response_model=schemas.CandidateResultsPage)
+    def new_style():
+        return payload
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    payload = results_page(args.rows)
+    adapter = TypeAdapter(schemas.CandidateResultsPage)
+
+    def model_data():
+        # What FastAPI does with a response model: validate, then dump JSON-ready data
+        return adapter.dump_python(adapter.validate_python(payload), mode="json")
+
+    encoders = [
+        ("encode: jsonable_encoder + json.dumps", lambda: json.dumps(jsonable_encoder(payload)).encode()),
+        ("encode: response model + json.dumps", lambda: json.dumps(model_data()).encode()),
+        ("encode: response model + orjson", lambda: orjson.dumps(model_data())),
+    ]
+    if msgpack is not None:
+        encoders.append(("encode: response model + msgpack",
+                         lambda: msgpack.packb(model_data(), default=serialization._msgpack_default)))
+
+    for name, encode in encoders:
+        size = len(encode())
+        common.report(name, common.measure(encode, args.iterations, warmup=2), f"bytes={size}")
+
+    client = TestClient(scratch_app(payload))
+    endpoints = [
+        ("endpoint: old (jsonable_encoder)", "/old", {}),
+        ("endpoint: new (orjson)", "/new", {}),
+    ]
+    if msgpack is not None:
+        endpoints.append(("endpoint: new (msgpack)", "/new", {"Accept": serialization.MSGPACK_MEDIA_TYPE}))
+
+    for name, path, headers in endpoints:
+        def call():
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200
+            return response
+        size = len(call().content)
+        common.report(name, common.measure(call, args.iterations, warmup=2), f"bytes={size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/startup.py
+"""Cold start: importing backend.app.main and serving the first request.
+
+    python benchmarks/startup.py [--runs 10]
+
+Each run is a fresh interpreter, so nothing is warm but the OS file
+cache. It times the import of backend.app.main, app startup (the lifespan
+hooks, through TestClient) and the first authenticated GET /me, and lists
+which heavy optional modules the import pulled in; none of them should be
+needed to serve the API. "interpreter" is a bare `python -c pass` for
+reference.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import common
+
+HEAVY_MODULES = ("requests", "numpy", "pyarrow", "pandas")
+
+
+def child():
+    started = time.perf_counter()
+    from backend.app.main import app
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        ready = time.perf_counter()
+        response = client.get("/me", headers={"Authorization": "Bearer " + os.environ["BENCH_TOKEN"]})
+        served = time.perf_counter()
+    assert response.status_code == 200, response.text
+
+    print(json.dumps({
+        "import": imported - started,
+        "startup": ready - imported,
+        "first_request": served - ready,
+        "loaded": [m for m in HEAVY_MODULES if m in sys.modules]
+    }))
+
+
+def run_child(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child()
+        return
+
+    from backend.app.db import SessionLocal
+    common.setup_database()
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        user = common.make_user(db)
+    finally:
+        db.close()
+
+    env = {
+        **os.environ,
+        # Children must use this database, not a fresh one of their own
+        "BENCH_DATABASE_URL": os.environ["DATABASE_URL"],
+        "BENCH_TOKEN": common.auth_headers(user)["Authorization"].split(" ", 1)[1],
+    }
+
+    interpreter = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        interpreter.append(time.perf_counter() - started)
+    common.report("interpreter", interpreter)
+
+    runs = [run_child(env) for _ in range(args.runs)]
+    for phase in ("import", "startup", "first_request"):
+        common.report(phase, [r[phase] for r in runs])
+    common.report("import + startup + first_request", [r["import"] + r["startup"] + r["first_request"] for r in runs])
+    print(f"heavy modules loaded by the app: {', '.join(runs[-1]['loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 # create_db.py
-from backend.app.db import Base, engine, SessionLocal
-from backend.app import models, auth
+from backend.app.db import SessionLocal
+from backend.app import models, auth, migrations
 
 print("Creating DB and tables...")
-Base.metadata.create_all(bind=engine)
+migrations.upgrade()
 db = SessionLocal()
 
 # create admin user (email: admin@nmk.com / password: adminpass)
@@ -30,8 +30,8 @@ if db.query(models.Question).count() == 0:
         ("What is the output of this python: sorted({3:1,2:2}.items(), key=lambda x: x[1]) ?", ["[(3,1),(2,2)]","[(2,2),(3,1)]","error","none"], 0, "hard"),
         ("In distributed systems, CAP theorem states:", ["Consistency, Availability, Partition tolerance (choose two)", "Capacity, Availability, Persistence","Consistency, Access, Partition","Connect, Apply, Persist"], 0, "hard"),
     ]
-    for text, choices, ans, diff in samples:
-        q = models.Question(text=text, choices=choices, answer_index=ans, difficulty=diff)
+    for text, choices, ans, _difficulty in samples:
+        q = models.Question(text=text, choices=choices, answer_index=ans)
         db.add(q)
     db.commit()
     print("Added sample questions")
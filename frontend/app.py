@@ -9,9 +9,18 @@ st.set_page_config(
 from streamlit_autorefresh import st_autorefresh
 import requests
 import time
+from datetime import timedelta
+from urllib.parse import urlencode
 import pandas as pd
 
+try:
+    import msgpack  # optional: smaller, faster API responses
+except ImportError:
+    msgpack = None
+
 API = "http://127.0.0.1:8000"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+RESULTS_PAGE_SIZE = 200
 
 
 
@@ -33,6 +42,11 @@ def init_session():
         "last_timer_tick": 0,
         "page": "home",
         "auto_resume_checked": False,  # ✅ NEW: Track if we checked for resume
+        "exam_job_id": None,  # background exam-generation job being polled
+        "results_filters": None,  # last Candidate Results query, to reset paging
+        "results_cursors": [None],  # keyset cursors of visited result pages
+        "results_summary": None,
+        "question_cache": {},  # candidate_exam_id -> (ETag, questions)
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -86,9 +100,23 @@ def auth_headers():
     return {"Authorization": f"Bearer {token}"}
 
 
+def with_accept(headers):
+    """Ask the API for MessagePack when we can decode it."""
+    if msgpack is None:
+        return headers
+    return {**(headers or {}), "Accept": f"{MSGPACK_MEDIA_TYPE}, application/json"}
+
+
+def read_json(resp):
+    """Response body as Python data, whichever encoding the API chose."""
+    if resp.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(resp.content)
+    return resp.json()
+
+
 def api_post(path, json=None, headers=None):
     try:
-        return requests.post(API + path, json=json, headers=headers, timeout=180)
+        return requests.post(API + path, json=json, headers=with_accept(headers), timeout=180)
     except Exception as e:
         st.error(f"Connection error: {e}")
         return None
@@ -96,26 +124,52 @@ def api_post(path, json=None, headers=None):
 
 def api_get(path, headers=None):
     try:
-        return requests.get(API + path, headers=headers, timeout=180)
+        return requests.get(API + path, headers=with_accept(headers), timeout=180)
     except Exception as e:
         st.error(f"Connection error: {e}")
         return None
 
 
+def fetch_questions(candidate_exam_id, headers):
+    """Questions of an attempt, revalidated with If-None-Match against the cached copy."""
+    cached = st.session_state["question_cache"].get(candidate_exam_id)
+    request_headers = dict(headers or {})
+    if cached:
+        request_headers["If-None-Match"] = cached[0]
+
+    # requests negotiates gzip/brotli and decodes the body itself
+    resp = api_get(f"/exam/{candidate_exam_id}/questions", headers=request_headers)
+    if resp is None:
+        return None
+    if resp.status_code == 304 and cached:
+        return cached[1]
+    if resp.status_code != 200:
+        return None
+
+    questions = resp.json()
+    st.session_state["question_cache"][candidate_exam_id] = (resp.headers.get("etag"), questions)
+    return questions
+
+
 def get_resumable_exam():
     """Check if user has an unfinished exam"""
     try:
-        resp = api_get("/exam/resume", headers=auth_headers())
-        if resp and resp.status_code == 200:
-            return resp.json()
-        return None
+        headers = auth_headers()
+        resp = api_get("/exam/resume?include_questions=false", headers=headers)
+        if not resp or resp.status_code != 200:
+            return None
+        resumable = read_json(resp)
+        resumable["questions"] = fetch_questions(resumable["candidate_exam_id"], headers)
+        if resumable["questions"] is None:
+            return None
+        return resumable
     except Exception as e:
         return None
 
 
 def api_patch(path, json=None, headers=None):
     try:
-        return requests.patch(API + path, json=json, headers=headers, timeout=10)
+        return requests.patch(API + path, json=json, headers=with_accept(headers), timeout=10)
     except Exception as e:
         st.error(f"Connection error: {e}")
         return None
@@ -218,7 +272,7 @@ def login_ui():
                 st.error("Invalid email or password")
                 return
 
-            token = resp.json().get("access_token")
+            token = read_json(resp).get("access_token")
             if not token:
                 st.error("Login failed. Please try again.")
                 return
@@ -229,7 +283,7 @@ def login_ui():
             # Get user info
             user_info = api_get("/me", headers=auth_headers())
             if user_info and user_info.status_code == 200:
-                st.session_state["is_admin"] = user_info.json().get("is_admin", False)
+                st.session_state["is_admin"] = read_json(user_info).get("is_admin", False)
             
             st.success("Login successful!")
             time.sleep(0.5)
@@ -262,26 +316,54 @@ def admin_dashboard():
                     st.error("Please fill in all fields")
                     return
                 
-                with st.spinner("Fetching questions from LLM... This may take a moment."):
-                    resp = api_post(
-                        "/admin/exams",
-                        json={
-                            "title": title,
-                            "language": language,
-                            "question_count": question_count,
-                            "time_allowed_secs": time_minutes * 60
-                        },
-                        headers=auth_headers()
+                resp = api_post(
+                    "/admin/exams",
+                    json={
+                        "title": title,
+                        "language": language,
+                        "question_count": question_count,
+                        "time_allowed_secs": time_minutes * 60
+                    },
+                    headers=auth_headers()
+                )
+
+                if resp and resp.status_code == 202:
+                    st.session_state["exam_job_id"] = read_json(resp)["id"]
+                    st.rerun()
+                else:
+                    error_detail = read_json(resp).get("detail", "Unknown error") if resp else "Connection failed"
+                    st.error(f"Failed to create exam: {error_detail}")
+
+        # 🔄 Poll the background generation job
+        job_id = st.session_state.get("exam_job_id")
+        if job_id:
+            st_autorefresh(interval=2000, key="exam_job_poll")
+
+            job_resp = api_get(f"/admin/exam-jobs/{job_id}", headers=auth_headers())
+
+            if job_resp and job_resp.status_code == 200:
+                job = read_json(job_resp)
+                collected = job["questions_collected"]
+                total = job["question_count"]
+
+                if job["status"] in ("pending", "running"):
+                    st.progress(
+                        min(collected / total, 1.0) if total else 0.0,
+                        text=f"Fetching questions from LLM... {collected}/{total} (attempts: {job['attempts']})"
                     )
-                    
-                    if resp and resp.status_code == 200:
-                        st.success(f"✅ Exam '{title}' created successfully!")
-                        st.balloons()
-                        time.sleep(1)
-                        st.rerun()
-                    else:
-                        error_detail = resp.json().get("detail", "Unknown error") if resp else "Connection failed"
-                        st.error(f"Failed to create exam: {error_detail}")
+                    if job.get("errors"):
+                        st.caption(f"⚠️ {len(job['errors'])} batch error(s), last: {job['errors'][-1]}")
+                elif job["status"] == "completed":
+                    st.session_state["exam_job_id"] = None
+                    st.success(f"✅ Exam '{job['title']}' created successfully!")
+                    st.balloons()
+                else:
+                    st.session_state["exam_job_id"] = None
+                    last_error = (job.get("errors") or ["Unknown error"])[-1]
+                    st.error(f"Failed to create exam: {last_error}")
+            else:
+                st.session_state["exam_job_id"] = None
+                st.error("Unable to load exam creation progress")
     
     # TAB 2: MANAGE EXAMS
     with tab2:
@@ -290,7 +372,7 @@ def admin_dashboard():
         resp = api_get("/admin/exams", headers=auth_headers())
         
         if resp and resp.status_code == 200:
-            exams = resp.json()
+            exams = read_json(resp)
             
             if not exams:
                 st.info("No exams created yet. Create your first exam!")
@@ -332,7 +414,7 @@ def admin_dashboard():
         resp = api_get("/admin/exams", headers=auth_headers())
         
         if resp and resp.status_code == 200:
-            exams = resp.json()
+            exams = read_json(resp)
             
             if not exams:
                 st.info("Create an exam first before assigning!")
@@ -370,7 +452,7 @@ def admin_dashboard():
                                 )
                                 
                                 if resp and resp.status_code == 200:
-                                    result = resp.json()
+                                    result = read_json(resp)
                                     st.success(f"✅ {result.get('msg', 'Exam assigned successfully!')}")
                                     time.sleep(1)
                                     st.rerun()
@@ -381,97 +463,145 @@ def admin_dashboard():
                 st.markdown("---")
                 st.subheader("Current Assignments")
                 
-                for exam in exams:
-                    if exam['is_active']:
-                        with st.expander(f"📋 {exam['title']} - Assignments"):
-                            assign_resp = api_get(
-                                f"/admin/exams/{exam['id']}/assignments",
-                                headers=auth_headers()
-                            )
-                            
-                            if assign_resp and assign_resp.status_code == 200:
-                                assignments = assign_resp.json()
-                                
-                                if not assignments:
-                                    st.info("No candidates assigned yet")
-                                else:
-                                    df = pd.DataFrame(assignments)
-                                    df['assigned_at'] = pd.to_datetime(df['assigned_at']).dt.strftime('%Y-%m-%d %H:%M')
-                                    st.dataframe(df, use_container_width=True)
+                # One grouped call for every exam's progress
+                summary_resp = api_get("/admin/exams/summary", headers=auth_headers())
+                
+                if summary_resp and summary_resp.status_code == 200:
+                    summary = [row for row in read_json(summary_resp) if row['is_active']]
+                    
+                    if summary:
+                        df = pd.DataFrame(summary)
+                        st.dataframe(
+                            df[['title', 'language', 'assigned', 'started', 'in_progress',
+                                'completed', 'timed_out', 'avg_score', 'median_score']],
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                else:
+                    st.error("Unable to load assignment summary")
+                
+                # Candidate lists are only fetched on demand
+                detail_exam_name = st.selectbox(
+                    "View candidates for", list(exam_options.keys()), key="assignment_detail_exam"
+                ) if exam_options else None
+                
+                if detail_exam_name and st.button("📋 Show Candidates"):
+                    assign_resp = api_get(
+                        f"/admin/exams/{exam_options[detail_exam_name]}/assignments",
+                        headers=auth_headers()
+                    )
+                    
+                    if assign_resp and assign_resp.status_code == 200:
+                        page = read_json(assign_resp)
+                        assignments = page["items"]
+                        
+                        if not assignments:
+                            st.info("No candidates assigned yet")
+                        else:
+                            df = pd.DataFrame(assignments)
+                            df['assigned_at'] = pd.to_datetime(df['assigned_at']).dt.strftime('%Y-%m-%d %H:%M')
+                            st.dataframe(df, use_container_width=True)
+                            if page.get("next_cursor"):
+                                st.caption(f"Showing the {len(assignments)} most recent assignments")
         else:
             st.error("Unable to load exams")
     
     # TAB 4: CANDIDATE RESULTS
     with tab4:
         st.subheader("All Candidate Results")
-        
-        resp = api_get("/admin/candidates/results", headers=auth_headers())
-        
+
+        exams_resp = api_get("/admin/exams", headers=auth_headers())
+        all_exams = read_json(exams_resp) if exams_resp and exams_resp.status_code == 200 else []
+        exam_ids = {f"{e['title']} ({e['language']})": e['id'] for e in all_exams}
+
+        # Filters are applied server-side
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            status_filter = st.multiselect(
+                "Filter by Status",
+                options=["completed", "in_progress", "timed_out"]
+            )
+        with col2:
+            exam_filter = st.multiselect("Filter by Exam", options=list(exam_ids.keys()))
+        with col3:
+            language_filter = st.text_input("Filter by Language")
+        with col4:
+            date_filter = st.date_input("Started between", value=())
+
+        params = [("limit", RESULTS_PAGE_SIZE)]
+        params += [("status", value) for value in status_filter]
+        params += [("exam_id", exam_ids[name]) for name in exam_filter]
+        if language_filter.strip():
+            params.append(("language", language_filter.strip()))
+        if len(date_filter) == 2:
+            params.append(("started_from", date_filter[0].isoformat()))
+            params.append(("started_to", (date_filter[1] + timedelta(days=1)).isoformat()))
+
+        # Reset paging whenever the filters change
+        if st.session_state["results_filters"] != params:
+            st.session_state["results_filters"] = params
+            st.session_state["results_cursors"] = [None]
+
+        cursors = st.session_state["results_cursors"]
+        page_params = params + ([("cursor", cursors[-1])] if cursors[-1] else [])
+
+        resp = api_get("/admin/candidates/results?" + urlencode(page_params), headers=auth_headers())
+
         if resp and resp.status_code == 200:
-            results = resp.json()
-            
+            page = read_json(resp)
+            results = page["items"]
+
+            # Summary only comes with the first page; keep it while paging
+            if page.get("summary"):
+                st.session_state["results_summary"] = page["summary"]
+            summary = st.session_state.get("results_summary") or {}
+
+            # Display metrics
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Total Attempts", summary.get("total", 0))
+            with col2:
+                st.metric("Completed", summary.get("completed", 0))
+            with col3:
+                st.metric("In Progress", summary.get("in_progress", 0))
+            with col4:
+                if summary.get("avg_score") is not None:
+                    st.metric("Avg Score", f"{summary['avg_score']:.1f}%")
+
+            st.markdown("---")
+
             if not results:
                 st.info("No exam attempts yet")
             else:
-                # Create DataFrame
                 df = pd.DataFrame(results)
-                
+
                 # Format datetime columns
                 df['started_at'] = pd.to_datetime(df['started_at']).dt.strftime('%Y-%m-%d %H:%M')
                 df['ended_at'] = pd.to_datetime(df['ended_at'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M')
-                
-                # Sort by started_at descending
-                df = df.sort_values('started_at', ascending=False)
-                
-                # Add filters
-                col1, col2 = st.columns(2)
-                with col1:
-                    status_filter = st.multiselect(
-                        "Filter by Status",
-                        options=df['status'].unique(),
-                        default=df['status'].unique()
-                    )
-                with col2:
-                    exam_filter = st.multiselect(
-                        "Filter by Exam",
-                        options=df['exam_title'].unique(),
-                        default=df['exam_title'].unique()
-                    )
-                
-                # Apply filters
-                filtered_df = df[
-                    (df['status'].isin(status_filter)) &
-                    (df['exam_title'].isin(exam_filter))
-                ]
-                
-                # Display metrics
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Total Attempts", len(filtered_df))
-                with col2:
-                    completed = len(filtered_df[filtered_df['status'] == 'completed'])
-                    st.metric("Completed", completed)
-                with col3:
-                    in_progress = len(filtered_df[filtered_df['status'] == 'in_progress'])
-                    st.metric("In Progress", in_progress)
-                with col4:
-                    if completed > 0:
-                        avg_score = filtered_df[filtered_df['status'] == 'completed']['score'].mean()
-                        st.metric("Avg Score", f"{avg_score:.1f}%")
-                
-                st.markdown("---")
-                
+
                 # Display table
                 display_columns = [
                     'candidate_name', 'candidate_email', 'exam_title', 
                     'exam_language', 'status', 'score', 'started_at', 'ended_at'
                 ]
-                
+
                 st.dataframe(
-                    filtered_df[display_columns],
+                    df[display_columns],
                     use_container_width=True,
                     hide_index=True
                 )
+
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if len(cursors) > 1 and st.button("⬅️ Previous", use_container_width=True):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                st.caption(f"Page {len(cursors)}")
+            with col3:
+                if page.get("next_cursor") and st.button("Next ➡️", use_container_width=True):
+                    cursors.append(page["next_cursor"])
+                    st.rerun()
         else:
             st.error("Unable to load candidate results")
 
@@ -543,7 +673,7 @@ def exam_selection_ui():
         st.error("Unable to load exams")
         return
 
-    exams = resp.json()
+    exams = read_json(resp)
 
     if not exams:
         st.info("No exams assigned to you")
@@ -574,14 +704,18 @@ def start_exam(exam_id):
         st.error("Unable to start exam")
         return
 
-    candidate_exam_id = resp.json().get("id")
+    candidate_exam_id = read_json(resp).get("id")
 
-    details = api_get(f"/exam/{candidate_exam_id}", headers=headers)
+    details = api_get(f"/exam/{candidate_exam_id}?include_questions=false", headers=headers)
     if not details or details.status_code != 200:
         st.error("Unable to load exam")
         return
 
-    data = details.json()
+    data = read_json(details)
+    data["questions"] = fetch_questions(candidate_exam_id, headers)
+    if data["questions"] is None:
+        st.error("Unable to load exam")
+        return
 
     st.session_state.update({
         "exam_id": exam_id,
@@ -600,25 +734,30 @@ def start_exam(exam_id):
     st.rerun()
 
 
-def save_answer(candidate_exam_id, qid, index):
-    qid_str = str(qid)
-    
-    if st.session_state["last_saved"].get(qid_str) == index:
+def save_answers(candidate_exam_id):
+    """Send every answer changed since the last save in one batch request."""
+    pending = {
+        qid: index for qid, index in st.session_state["answers"].items()
+        if st.session_state["last_saved"].get(qid) != index
+    }
+    if not pending:
         return True
     
     headers = auth_headers()
     elapsed = st.session_state["time_original"] - st.session_state["time_remaining"]
 
     payload = {
-        "question_id": qid_str,
-        "selected_index": index,
+        "answers": [
+            {"question_id": qid, "selected_index": index}
+            for qid, index in pending.items()
+        ],
         "time_elapsed": elapsed,
     }
 
-    resp = api_post(f"/exam/{candidate_exam_id}/save-answer", json=payload, headers=headers)
+    resp = api_post(f"/exam/{candidate_exam_id}/answers:batch", json=payload, headers=headers)
     
     if resp and resp.status_code == 200:
-        st.session_state["last_saved"][qid_str] = index
+        st.session_state["last_saved"].update(pending)
         return True
     
     return False
@@ -630,19 +769,19 @@ def submit_exam():
 
     candidate_exam_id = st.session_state["candidate_exam_id"]
     headers = auth_headers()
-    
-    for q in st.session_state["questions"]:
-        qid = q["id"]
-        qid_str = str(qid)
-        sel = st.session_state["answers"].get(qid_str)
-        if sel is not None:
-            save_answer(candidate_exam_id, qid, sel)
 
     elapsed = st.session_state["time_original"] - st.session_state["time_remaining"]
 
+    # Final answers travel with the submit, one request in total
     resp = api_post(
         f"/exam/{candidate_exam_id}/submit",
-        json={"final_time_elapsed": elapsed},
+        json={
+            "final_time_elapsed": elapsed,
+            "answers": [
+                {"question_id": qid, "selected_index": index}
+                for qid, index in st.session_state["answers"].items()
+            ],
+        },
         headers=headers,
     )
     
@@ -710,13 +849,16 @@ def exam_ui():
             if selected is not None:
                 selected_idx = q["choices"].index(selected)
 
-                if st.session_state["answers"].get(qid) != selected_idx:
-                    st.session_state["answers"][qid] = selected_idx
-                    save_answer(candidate_exam_id, qid, selected_idx)
+                st.session_state["answers"][qid] = selected_idx
+
+                if st.session_state["last_saved"].get(qid) != selected_idx:
                     st.caption("✅ Answer saved")
 
             st.divider()
 
+        # 💾 Save all changes from this rerun in one request
+        save_answers(candidate_exam_id)
+
         # Submit button
         if st.button("📤 Submit Exam", type="primary", use_container_width=True):
             submit_exam()
@@ -743,7 +885,7 @@ def results_ui():
     
     res = api_get(f"/exam/{candidate_exam_id}/result", headers=headers)
     if res and res.status_code == 200:
-        result_data = res.json()
+        result_data = read_json(res)
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
@@ -0,0 +1,92 @@
+# tests/conftest.py
+"""Shared fixtures: a throwaway SQLite database, the app and a query counter.
+
+The environment is set before anything from backend.app is imported, so the
+engines are created against the test database and no background workers
+(outbox, expiry sweeper, answer flusher, hash pool) are started.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+_TMP = tempfile.mkdtemp(prefix="nmk-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("DATABASE_READ_REPLICA_URL", None)
+os.environ["EMAIL_OUTBOX_ENABLED"] = "0"
+os.environ["EXAM_EXPIRY_ENABLED"] = "0"
+os.environ["ANSWER_WRITE_BEHIND"] = "0"
+os.environ["ANSWER_JOURNAL_PATH"] = os.path.join(_TMP, "answer_journal.jsonl")
+os.environ["HASH_POOL_SIZE"] = "0"
+
+import pytest
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+from backend.app import migrations, answer_buffer
+from backend.app.db import engine, SessionLocal
+from backend.app.async_db import async_engine
+from backend.app.main import app
+from factories import make_user, auth_headers, make_exam, assign  # noqa: F401  (tests import them from here)
+
+migrations.upgrade()
+
+
+class QueryCounter:
+    """before_cursor_execute listener that records every statement sent."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager counting statements on both the sync and async engines."""
+    @contextmanager
+    def counting():
+        counter = QueryCounter()
+        engines = [engine, async_engine.sync_engine]
+        for e in engines:
+            event.listen(e, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            for e in engines:
+                event.remove(e, "before_cursor_execute", counter)
+    return counting
+
+
+@pytest.fixture
+def write_behind(monkeypatch, tmp_path):
+    """Turn the write-behind answer buffer on, journaling under tmp_path."""
+    monkeypatch.setattr(answer_buffer, "ENABLED", True)
+    monkeypatch.setattr(answer_buffer, "JOURNAL_PATH", str(tmp_path / "answer_journal.jsonl"))
+    yield
+    with answer_buffer._lock:
+        answer_buffer._pending.clear()
+        answer_buffer._owners.clear()
+        if answer_buffer._journal is not None:
+            answer_buffer._journal.close()
+            answer_buffer._journal = None
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
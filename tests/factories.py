@@ -0,0 +1,47 @@
+# tests/factories.py
+"""Row factories shared by the test fixtures and the benchmark scripts.
+
+Import after the environment points DATABASE_URL at a throwaway database
+(conftest.py and benchmarks/common.py both do so first).
+"""
+import uuid
+from backend.app import models, auth, exam
+
+
+def make_user(db, is_admin: bool = False) -> models.User:
+    user = models.User(
+        email=f"{uuid.uuid4().hex[:12]}@example.com",
+        name="Test",
+        hashed_password="not-a-real-hash",
+        is_admin=is_admin
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def auth_headers(user: models.User) -> dict:
+    return {"Authorization": "Bearer " + auth.create_access_token({"sub": user.email})}
+
+
+def make_exam(
+    db, admin: models.User, question_count: int, choices: list = None, time_allowed_secs: int = 600
+) -> models.Exam:
+    questions = [
+        models.Question(text=f"Question {i}", choices=choices or ["a", "b", "c", "d"], answer_index=i % 4, language="python")
+        for i in range(question_count)
+    ]
+    db.add_all(questions)
+    db.flush()
+    new_exam = exam.create_exam_with_questions(
+        db, "Test exam", "python", time_allowed_secs, admin.id, [q.id for q in questions]
+    )
+    db.commit()
+    return new_exam
+
+
+def assign(db, exam_obj: models.Exam, admin: models.User, candidate: models.User) -> models.ExamAssignment:
+    assignment = models.ExamAssignment(exam_id=exam_obj.id, candidate_email=candidate.email, assigned_by=admin.id)
+    db.add(assignment)
+    db.commit()
+    return assignment
@@ -0,0 +1,83 @@
+# tests/test_answer_buffer.py
+import time
+import threading
+import pytest
+from backend.app import answer_buffer, exam, models
+from conftest import make_user, auth_headers, make_exam, assign
+
+
+def test_failed_submit_keeps_buffered_answers(client, db, monkeypatch, write_behind):
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, 4)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+    question_ids = exam.exam_question_ids(db, exam_obj.id)
+
+    ce_id = client.post(f"/exam/{exam_obj.id}/start", headers=headers).json()["id"]
+    for qid in question_ids[:2]:
+        saved = client.post(f"/exam/{ce_id}/save-answer", headers=headers, json={
+            "question_id": qid, "selected_index": 0, "time_elapsed": 5
+        })
+        assert saved.status_code == 200, saved.text
+    assert answer_buffer.peek(ce_id)["answers"] == {qid: 0 for qid in question_ids[:2]}
+
+    def broken_grading(*args, **kwargs):
+        raise RuntimeError("grading failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(exam, "grade_attempt", broken_grading)
+        with pytest.raises(RuntimeError):
+            client.post(f"/exam/{ce_id}/submit", headers=headers, json={"final_time_elapsed": 10})
+
+    # Still buffered (and journaled) after the rolled-back submit
+    assert answer_buffer.peek(ce_id)["answers"] == {qid: 0 for qid in question_ids[:2]}
+
+    submitted = client.post(f"/exam/{ce_id}/submit", headers=headers, json={"final_time_elapsed": 10})
+    assert submitted.status_code == 200, submitted.text
+    assert submitted.json()["status"] == "completed"
+    assert answer_buffer.peek(ce_id) is None
+
+    result = client.get(f"/exam/{ce_id}/result", headers=headers).json()
+    assert [d["selected"] for d in result["details"]] == [0, 0, None, None]
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/exam/resume"),
+    ("GET", "/exam/{id}"),
+    ("GET", "/exam/{id}/result"),
+    ("POST", "/exam/{id}/save-answer"),
+])
+def test_buffer_lock_is_not_taken_on_the_event_loop(client, db, write_behind, method, path):
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, 2)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+    question_ids = exam.exam_question_ids(db, exam_obj.id)
+    ce_id = client.post(f"/exam/{exam_obj.id}/start", headers=headers).json()["id"]
+    # Attempt without a deadline, so time_elapsed comes from the buffer too
+    db.query(models.CandidateExam).filter(models.CandidateExam.id == ce_id).update({"deadline_at": None})
+    db.commit()
+    save = {"question_id": question_ids[0], "selected_index": 1, "time_elapsed": 7}
+    assert client.post(f"/exam/{ce_id}/save-answer", headers=headers, json=save).status_code == 200
+
+    responses, probes = [], []
+    blocked = threading.Thread(target=lambda: responses.append(
+        client.request(method, path.format(id=ce_id), headers=headers, json=save)
+    ))
+    probe = threading.Thread(target=lambda: probes.append(client.get("/me", headers=headers)))
+    # Held as if by a slow journal fsync: only the request using the buffer waits
+    with answer_buffer._lock:
+        blocked.start()
+        time.sleep(0.2)
+        probe.start()
+        probe.join(timeout=2)
+        loop_was_free = not probe.is_alive()
+        request_waited = blocked.is_alive()
+    probe.join()
+    blocked.join()
+
+    assert loop_was_free and request_waited
+    assert probes[0].status_code == 200
+    assert responses[0].status_code == 200, responses[0].text
@@ -0,0 +1,49 @@
+# tests/test_auth.py
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend.app import hashing
+
+
+def _register(client) -> dict:
+    creds = {"email": f"{uuid.uuid4().hex[:12]}@example.com", "password": "s3cret-pass"}
+    response = client.post("/register", json=creds)
+    assert response.status_code == 200, response.text
+    return creds
+
+
+@pytest.fixture
+def hash_pool(monkeypatch):
+    """A started pool (threads stand in for the worker processes)."""
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(hashing, "_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+def test_register_then_login(client):
+    creds = _register(client)
+    assert client.post("/register", json=creds).status_code == 400
+
+    token = client.post("/login", json=creds)
+    assert token.status_code == 200, token.text
+    me = client.get("/me", headers={"Authorization": "Bearer " + token.json()["access_token"]})
+    assert me.json()["email"] == creds["email"]
+
+    assert client.post("/login", json={**creds, "password": "wrong"}).status_code == 400
+
+
+def test_login_awaits_the_hash_pool(client, hash_pool):
+    creds = _register(client)
+    completed = hashing.get_metrics()["completed"]
+    assert client.post("/login", json=creds).status_code == 200
+    assert hashing.get_metrics()["completed"] == completed + 1
+    assert hashing.get_metrics()["in_flight"] == 0
+
+
+def test_full_hash_queue_returns_503(client, hash_pool, monkeypatch):
+    creds = _register(client)
+    monkeypatch.setattr(hashing, "_pending", hashing.HASH_QUEUE_LIMIT)
+    busy = client.post("/login", json=creds)
+    assert busy.status_code == 503
+    assert busy.headers["retry-after"] == str(hashing.HASH_RETRY_AFTER_SECS)
@@ -0,0 +1,56 @@
+# tests/test_content_cache.py
+"""Question content is served once per client, then revalidated by ETag."""
+import gzip
+from backend.app import content_cache
+from conftest import make_user, auth_headers, make_exam, assign
+
+
+def _start(client, db, question_count: int = 5):
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, question_count)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+
+    started = client.post(f"/exam/{exam_obj.id}/start", headers=headers)
+    assert started.status_code == 200, started.text
+    return headers, started.json()["id"]
+
+
+def test_questions_revalidate_with_etag(client, db):
+    headers, ce_id = _start(client, db)
+
+    first = client.get(f"/exam/{ce_id}/questions", headers={**headers, "Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert len(first.json()) == 5
+
+    again = client.get(f"/exam/{ce_id}/questions", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_detail_and_resume_can_skip_questions(client, db):
+    headers, ce_id = _start(client, db)
+
+    detail = client.get(f"/exam/{ce_id}?include_questions=false", headers=headers)
+    assert detail.status_code == 200
+    assert detail.json()["questions"] is None
+
+    resume = client.get("/exam/resume?include_questions=false", headers=headers)
+    assert resume.status_code == 200
+    assert resume.json()["questions"] is None
+
+    assert len(client.get(f"/exam/{ce_id}", headers=headers).json()["questions"]) == 5
+
+
+def test_only_cached_content_is_compressed():
+    questions = [{"id": "q1", "text": "x" * 200, "choices": ["a", "b"]}]
+
+    uncached = content_cache.ExamContent(["q1"], questions)
+    assert uncached.gzip is None and uncached.br is None
+    assert uncached.encoded("gzip, br") == (uncached.body, None)
+
+    cached = content_cache.ExamContent(["q1"], questions, compress=True)
+    body, encoding = cached.encoded("gzip")
+    assert encoding == "gzip" and gzip.decompress(body) == cached.body
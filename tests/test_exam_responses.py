@@ -0,0 +1,31 @@
+# tests/test_exam_responses.py
+"""Exam responses validate against their response models for any stored content."""
+from backend.app import llm
+from conftest import make_user, auth_headers, make_exam, assign
+
+
+def test_numeric_choices_are_served(client, db):
+    # Stored as the LLM sent them, before options were normalised to strings
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, 3, choices=[3, 4, 5.5, "6"])
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+
+    ce_id = client.post(f"/exam/{exam_obj.id}/start", headers=headers).json()["id"]
+
+    detail = client.get(f"/exam/{ce_id}", headers=headers)
+    assert detail.status_code == 200, detail.text
+    assert detail.json()["questions"][0]["choices"] == [3, 4, 5.5, "6"]
+
+    submitted = client.post(f"/exam/{ce_id}/submit", headers=headers, json={"final_time_elapsed": 10})
+    assert submitted.status_code == 200, submitted.text
+
+    result = client.get(f"/exam/{ce_id}/result", headers=headers)
+    assert result.status_code == 200, result.text
+    assert result.json()["details"][0]["choices"] == [3, 4, 5.5, "6"]
+
+
+def test_llm_options_are_stored_as_strings():
+    question = llm._to_question({"Question": "2 + 2?", "Options": [3, 4, 5], "Answer": 4})
+    assert question == {"question": "2 + 2?", "options": ["3", "4", "5"], "answer_index": 1}
@@ -0,0 +1,93 @@
+# tests/test_expiry.py
+from datetime import datetime, timedelta
+from backend.app import answer_buffer, exam, expiry, models
+from backend.app.db import SessionLocal
+from conftest import make_user, auth_headers, make_exam, assign
+
+
+def _expire(ce_id: str):
+    db = SessionLocal()
+    try:
+        ce = db.get(models.CandidateExam, ce_id)
+        ce.deadline_at = datetime.utcnow() - timedelta(seconds=exam.DEADLINE_GRACE_SECS + 60)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_sweep_closes_buffered_attempts(client, db, write_behind):
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, 3)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+    qid = exam.exam_question_ids(db, exam_obj.id)[0]
+
+    ce_id = client.post(f"/exam/{exam_obj.id}/start", headers=headers).json()["id"]
+    saved = client.post(f"/exam/{ce_id}/save-answer", headers=headers, json={
+        "question_id": qid, "selected_index": 0, "time_elapsed": 5
+    })
+    assert saved.status_code == 200, saved.text
+    _expire(ce_id)
+
+    assert expiry.sweep() >= 1
+    assert answer_buffer.peek(ce_id) is None
+    assert ce_id not in answer_buffer._owners
+
+    db.expire_all()
+    ce = db.get(models.CandidateExam, ce_id)
+    assert ce.status == "timed_out"
+    assert ce.answers == {qid: 0}
+
+
+def test_start_times_out_expired_attempt_once(client, db):
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, 3)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+    exam_id = exam_obj.id
+
+    old_id = client.post(f"/exam/{exam_id}/start", headers=headers).json()["id"]
+    _expire(old_id)
+
+    new_id = client.post(f"/exam/{exam_id}/start", headers=headers).json()["id"]
+    assert new_id != old_id
+
+    db.expire_all()
+    assert db.get(models.CandidateExam, old_id).status == "timed_out"
+    stats = db.query(models.ItemStat).filter(models.ItemStat.exam_id == exam_id).all()
+    assert [s.attempts for s in stats] == [1, 1, 1]
+    # Nothing left for the sweeper to grade a second time
+    assert old_id not in [ce.id for ce in expiry.claim_expired(db, 10)]
+    db.rollback()
+
+
+def test_start_does_not_regrade_attempt_the_sweeper_closed(client, db, monkeypatch):
+    from backend.app import main
+
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, 3)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+    exam_id = exam_obj.id
+
+    old_id = client.post(f"/exam/{exam_id}/start", headers=headers).json()["id"]
+    _expire(old_id)
+
+    active_attempt = main._active_attempt
+
+    async def read_then_sweep(db, user_id):
+        # The sweeper closes the attempt right after start_exam read it
+        attempt = await active_attempt(db, user_id)
+        assert expiry.sweep() >= 1
+        return attempt
+
+    monkeypatch.setattr(main, "_active_attempt", read_then_sweep)
+    new_id = client.post(f"/exam/{exam_id}/start", headers=headers).json()["id"]
+    assert new_id != old_id
+
+    db.expire_all()
+    stats = db.query(models.ItemStat).filter(models.ItemStat.exam_id == exam_id).all()
+    assert [s.attempts for s in stats] == [1, 1, 1]
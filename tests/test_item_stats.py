@@ -0,0 +1,84 @@
+# tests/test_item_stats.py
+"""Incremental item-analysis counters agree with the NumPy recompute."""
+import numpy as np
+from backend.app import exam, item_stats
+from conftest import make_user, auth_headers, make_exam, assign
+
+# Rows: candidates, columns: questions; None = unanswered, 7 = past the 4 choices
+ANSWERS = [
+    [0, 1, 2, 3],
+    [0, 0, None, 3],
+    [1, 1, 2, 7],
+    [0, None, 0, 0],
+    [2, 1, 2, 3],
+    [0, 1, None, None],
+]
+
+
+def _take(client, db, exam_obj, admin, row, question_ids):
+    candidate = make_user(db)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+    ce_id = client.post(f"/exam/{exam_obj.id}/start", headers=headers).json()["id"]
+    answers = [
+        {"question_id": qid, "selected_index": index}
+        for qid, index in zip(question_ids, row) if index is not None
+    ]
+    submitted = client.post(f"/exam/{ce_id}/submit", headers=headers, json={"final_time_elapsed": 30, "answers": answers})
+    assert submitted.status_code == 200, submitted.text
+
+
+def test_incremental_counters_match_recompute(client, db):
+    admin = make_user(db, is_admin=True)
+    exam_obj = make_exam(db, admin, 4)  # answer key: 0, 1, 2, 3
+    exam_id = exam_obj.id
+    question_ids = exam.exam_question_ids(db, exam_id)
+    for row in ANSWERS:
+        _take(client, db, exam_obj, admin, row, question_ids)
+
+    incremental = item_stats.exam_item_stats(db, exam_id)
+    item_stats.recompute(db, exam_id)
+    db.commit()
+    assert item_stats.exam_item_stats(db, exam_id) == incremental
+
+    key = [0, 1, 2, 3]
+    correct = np.array([[index == k for index, k in zip(row, key)] for row in ANSWERS])
+    scores = correct.sum(axis=1)
+    for j, item in enumerate(incremental):
+        column = [row[j] for row in ANSWERS]
+        assert item["attempts"] == len(ANSWERS)
+        assert item["correct"] == correct[:, j].sum()
+        assert item["choice_counts"] == [column.count(i) for i in range(4)]
+        assert item["omitted"] == len(ANSWERS) - sum(item["choice_counts"])
+        expected = np.corrcoef(correct[:, j], scores)[0, 1] if 0 < correct[:, j].sum() < len(ANSWERS) else None
+        if expected is None:
+            assert item["point_biserial"] is None
+        else:
+            assert abs(item["point_biserial"] - expected) < 1e-9
+
+
+def test_negative_indexes_are_unanswered(client, db):
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, 2)
+    exam_id = exam_obj.id
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+    question_ids = exam.exam_question_ids(db, exam_id)
+    ce_id = client.post(f"/exam/{exam_id}/start", headers=headers).json()["id"]
+
+    rejected = client.post(f"/exam/{ce_id}/save-answer", headers=headers, json={
+        "question_id": question_ids[0], "selected_index": -1, "time_elapsed": 5
+    })
+    assert rejected.status_code == 422
+
+    # Saved before selected_index was validated
+    exam.save_answers(db, ce_id, {question_ids[0]: -3})
+    db.commit()
+    assert client.post(f"/exam/{ce_id}/submit", headers=headers, json={"final_time_elapsed": 5}).status_code == 200
+
+    incremental = item_stats.exam_item_stats(db, exam_id)
+    assert incremental[0]["omitted"] == 1 and incremental[0]["choice_counts"] == [0, 0, 0, 0]
+    item_stats.recompute(db, exam_id)
+    db.commit()
+    assert item_stats.exam_item_stats(db, exam_id) == incremental
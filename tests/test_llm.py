@@ -0,0 +1,48 @@
+# tests/test_llm.py
+"""QuestionStreamParser: same questions whatever the chunking, nothing from a cut object."""
+import json
+from backend.app import llm
+
+
+def _body(questions: list) -> str:
+    return "```json\n" + json.dumps(questions) + "\n```"
+
+
+def _chunked(body: str, size: int) -> list:
+    parser = llm.QuestionStreamParser()
+    out = []
+    for i in range(0, len(body), size):
+        out += parser.feed(body[i:i + size])
+    return out
+
+
+QUESTIONS = [
+    {"Question": "What does {} create in Python?", "Options": ["dict", "set"], "Answer": "dict"},
+    {"Question": 'Output of print("}{")?', "Options": ["}{", "{}"], "Answer": "}{"},
+    {"Question": "Plain one", "Options": ["a", "b", "c"], "Answer": "c"},
+]
+
+
+def test_braces_in_question_text():
+    parsed = llm.parse_llm_response(_body(QUESTIONS))
+    assert [q["question"] for q in parsed] == [q["Question"] for q in QUESTIONS]
+    assert [q["answer_index"] for q in parsed] == [0, 0, 2]
+
+
+def test_escapes_split_across_chunks():
+    body = _body(QUESTIONS)
+    # Every split point, including right after each backslash
+    for size in (1, 2, 3, 7):
+        assert _chunked(body, size) == llm.parse_llm_response(body)
+
+    backslash = body.index("\\")
+    parser = llm.QuestionStreamParser()
+    parsed = parser.feed(body[:backslash + 1]) + parser.feed(body[backslash + 1:])
+    assert parsed == llm.parse_llm_response(body)
+
+
+def test_truncated_trailing_object_is_dropped():
+    body = _body(QUESTIONS)
+    cut = body[:body.index('{"Question": "Plain one"') + 20]
+    assert [q["question"] for q in llm.parse_llm_response(cut)] == [q["Question"] for q in QUESTIONS[:2]]
+    assert _chunked(cut, 5) == llm.parse_llm_response(cut)
@@ -0,0 +1,33 @@
+# tests/test_outbox.py
+from backend.app import models, outbox
+from backend.app.db import SessionLocal
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append(msg["To"])
+
+
+def test_send_pending_does_not_reload_rows(db, count_queries):
+    db.query(models.EmailOutbox).delete()
+    for i in range(5):
+        outbox.enqueue_email(db, f"c{i}@example.com", "exam_assignment", exam_title="Test exam")
+    db.commit()
+
+    conn = _FakeConnection()
+    with count_queries() as counter:
+        assert outbox.send_pending(conn) == 5
+
+    assert len(conn.sent) == 5
+    selects = [s for s in counter.statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 1, selects
+
+    check = SessionLocal()
+    try:
+        statuses = {row.status for row in check.query(models.EmailOutbox)}
+    finally:
+        check.close()
+    assert statuses == {"sent"}
@@ -0,0 +1,51 @@
+# tests/test_pagination.py
+"""Keyset pages cover every row exactly once, even when timestamps tie."""
+from sqlalchemy import text
+from backend.app import models
+from conftest import make_user, auth_headers, make_exam
+
+TIED_AT = "2026-01-05 09:30:00"  # CURRENT_TIMESTAMP format: no fraction
+
+
+def _walk(client, path: str, headers: dict, params: dict, key: str) -> list:
+    seen, cursor = [], None
+    for _ in range(20):
+        response = client.get(path, headers=headers, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        seen += [item[key] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+    raise AssertionError(f"next_cursor never ran out: {len(seen)} items seen")
+
+
+def test_results_pages_with_tied_started_at(client, db):
+    admin = make_user(db, is_admin=True)
+    exam_obj = make_exam(db, admin, 2)
+    exam_id = exam_obj.id
+    attempts = [
+        models.CandidateExam(user_id=make_user(db).id, exam_id=exam_id, status="completed", score=50)
+        for _ in range(5)
+    ]
+    db.add_all(attempts)
+    db.commit()
+    db.execute(text("UPDATE candidate_exams SET started_at = :at WHERE exam_id = :exam_id"), {"at": TIED_AT, "exam_id": exam_id})
+    db.commit()
+
+    seen = _walk(client, "/admin/candidates/results", auth_headers(admin), {"exam_id": exam_id, "limit": 2}, "candidate_exam_id")
+    assert sorted(seen) == sorted(a.id for a in attempts)
+
+
+def test_assignment_pages_with_tied_assigned_at(client, db):
+    admin = make_user(db, is_admin=True)
+    exam_obj = make_exam(db, admin, 2)
+    exam_id = exam_obj.id
+    emails = [make_user(db).email for _ in range(5)]
+    db.add_all([models.ExamAssignment(exam_id=exam_id, candidate_email=e, assigned_by=admin.id) for e in emails])
+    db.commit()
+    db.execute(text("UPDATE exam_assignments SET assigned_at = :at WHERE exam_id = :exam_id"), {"at": TIED_AT, "exam_id": exam_id})
+    db.commit()
+
+    seen = _walk(client, f"/admin/exams/{exam_id}/assignments", auth_headers(admin), {"limit": 2}, "candidate_email")
+    assert sorted(seen) == sorted(emails)
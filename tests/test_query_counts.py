@@ -0,0 +1,104 @@
+# tests/test_query_counts.py
+"""Hot endpoints must issue the same number of queries whatever the exam size."""
+import pytest
+from backend.app import models, exam, content_cache
+from conftest import make_user, auth_headers, make_exam, assign
+
+SIZES = (3, 30)
+
+
+def _attempt(client, db, question_count: int, answered: int = 2):
+    """An in-progress attempt with a few saved answers; returns (headers, candidate_exam_id)."""
+    admin = make_user(db, is_admin=True)
+    candidate = make_user(db)
+    exam_obj = make_exam(db, admin, question_count)
+    assign(db, exam_obj, admin, candidate)
+    headers = auth_headers(candidate)
+
+    started = client.post(f"/exam/{exam_obj.id}/start", headers=headers)
+    assert started.status_code == 200, started.text
+    ce_id = started.json()["id"]
+
+    question_ids = exam.exam_question_ids(db, exam_obj.id)
+    saved = client.post(f"/exam/{ce_id}/answers:batch", headers=headers, json={
+        "answers": [{"question_id": qid, "selected_index": 0} for qid in question_ids[:answered]],
+        "time_elapsed": 5
+    })
+    assert saved.status_code == 200, saved.text
+    return headers, ce_id
+
+
+def _count(count_queries, request) -> int:
+    # Question content is cached per exam; measure the uncached load
+    content_cache._cache.clear()
+    with count_queries() as counter:
+        response = request()
+    assert response.status_code == 200, response.text
+    return counter.count
+
+
+@pytest.mark.parametrize("path", ["/exam/{id}", "/exam/resume", "/exam/{id}/result"])
+def test_candidate_reads_are_constant(client, db, count_queries, path):
+    counts = []
+    for size in SIZES:
+        headers, ce_id = _attempt(client, db, size)
+        if path.endswith("/result"):
+            submitted = client.post(f"/exam/{ce_id}/submit", headers=headers, json={"final_time_elapsed": 10})
+            assert submitted.status_code == 200, submitted.text
+        counts.append(_count(count_queries, lambda: client.get(path.format(id=ce_id), headers=headers)))
+
+    assert counts[0] == counts[1], counts
+    assert counts[0] <= 5, counts
+
+
+def test_grading_is_constant(client, db, count_queries):
+    counts = []
+    for size in SIZES:
+        _, ce_id = _attempt(client, db, size)
+        candidate_exam = db.get(models.CandidateExam, ce_id)
+        with count_queries() as counter:
+            exam.grade_attempt(db, candidate_exam)
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1], counts
+    assert counts[0] == 1, counts
+
+
+def test_exam_assignments_is_constant(client, db, count_queries):
+    admin = make_user(db, is_admin=True)
+    headers = auth_headers(admin)
+    client.get("/me", headers=headers)  # warm the user cache
+
+    counts = []
+    for size in SIZES:
+        exam_obj = make_exam(db, admin, 3)
+        for i in range(size):
+            candidate = make_user(db)
+            assign(db, exam_obj, admin, candidate)
+            if i % 2:
+                db.add(models.CandidateExam(
+                    user_id=candidate.id, exam_id=exam_obj.id, question_ids=[], answers={},
+                    status="completed", score=50
+                ))
+        db.commit()
+        exam_id = exam_obj.id
+
+        with count_queries() as counter:
+            response = client.get(f"/admin/exams/{exam_id}/assignments", headers=headers)
+        assert response.status_code == 200, response.text
+        items = response.json()["items"]
+        assert len(items) == size
+        assert sum(item["status"] == "completed" for item in items) == size // 2
+        counts.append(counter.count)
+
+        with count_queries() as counter:
+            response = client.get(
+                f"/admin/exams/{exam_id}/assignments",
+                headers=headers, params={"status": "completed", "limit": 2}
+            )
+        assert response.status_code == 200, response.text
+        assert [item["status"] for item in response.json()["items"]] == ["completed"] * min(2, size // 2)
+        counts.append(counter.count)
+
+    assert len(set(counts)) == 1, counts
+    assert counts[0] == 1, counts